@@ -0,0 +1,81 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Many concurrent connections parsed on one event loop with AsyncStream.
+
+An in-process asyncio server runs iter_records() on every connection. The
+clients (in the same loop) each write their records in small pieces with
+a drain() after each one, so record boundaries and tokens get split across
+reads. Reports wall time, records and tokens per second. A connection never
+parses more than one chunk between two awaits, so the loop stays responsive;
+with every client in the same process the run is bound by parsing and socket
+work on the one core.
+"""
+
+import argparse
+import asyncio
+import time
+
+import common
+
+from base import PatternLexer, EOF
+from AsyncStream import iter_records
+
+
+RECORDS = [b'[a, b=c, [d, e]] = [f, g]', b'[h, [i, [j, k=l]]]', b'[m, n]=[o]']
+
+
+async def bench(connections, records, piece):
+    state = {'records': 0, 'errors': 0}
+    finished = asyncio.Event()
+    payload = b'\n'.join(RECORDS[i % len(RECORDS)] for i in range(records))
+    pieces = [payload[i:i + piece] for i in range(0, len(payload), piece)]
+
+    async def handle(reader, writer):
+        try:
+            async for record in iter_records(reader):
+                state['records'] += 1
+        except Exception:
+            state['errors'] += 1
+        writer.close()
+        if state['records'] + state['errors'] >= connections * records:
+            finished.set()
+
+    async def send(port):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for chunk in pieces:
+            writer.write(chunk)
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0, backlog=connections)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        start = time.perf_counter()
+        await asyncio.gather(*[send(port) for i in range(connections)])
+        await finished.wait()
+        elapsed = time.perf_counter() - start
+
+    return elapsed, state
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--connections', type=int, nargs='+', default=[100, 1000, 5000])
+    arg_parser.add_argument('--records', type=int, default=50, help='records per connection')
+    arg_parser.add_argument('--piece', type=int, default=64, help='bytes per client write')
+    args = arg_parser.parse_args()
+
+    tokens = sum(common.drain(PatternLexer(RECORDS[i % len(RECORDS)].decode()), EOF) for i in range(args.records))
+    print('{0:>12}{1:>12}{2:>14}{3:>14}{4:>8}'.format('connections', 'seconds', 'records/s', 'tokens/s', 'errors'))
+    for connections in args.connections:
+        elapsed, state = asyncio.run(bench(connections, args.records, args.piece))
+        print('{0:>12}{1:>12.2f}{2:>14,.0f}{3:>14,.0f}{4:>8}'.format(
+            connections, elapsed, state['records'] / elapsed, tokens * connections / elapsed, state['errors']))
+
+
+if __name__ == '__main__':
+    main()
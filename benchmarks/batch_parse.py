@@ -0,0 +1,73 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Throughput of Batch.parse_many against building a parser per record.
+
+The records are small stat inputs like ``[a,b,c=d]``. The baseline builds a
+fresh lexer and MemoBacktrackParser for every record; parse_many reuses one
+pair per process through reset() and is measured with an increasing number of
+worker processes.
+"""
+
+import argparse
+import os
+import random
+
+import common
+
+import Batch
+from Memorize import MemoBacktrackParser
+from base import NativeBuilder, ParseError, PatternLexer
+
+
+def records(n, seed=0):
+    rng = random.Random(seed)
+    names = 'abcdefgh'
+    out = []
+    for i in range(n):
+        items = [rng.choice(names) if rng.random() < 0.7 else '{a}={b}'.format(a=rng.choice(names), b=rng.choice(names))
+                 for j in range(rng.randint(1, 6))]
+        out.append('[' + ','.join(items) + ']')
+
+    return out
+
+
+def fresh(data):
+    results = []
+    for record in data:
+        try:
+            results.append(MemoBacktrackParser(PatternLexer(record), builder=NativeBuilder()).stat())
+        except ParseError as e:
+            results.append(e)
+
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('-n', type=int, default=100000, help='number of records')
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--chunk-size', type=int, default=Batch.DEFAULT_CHUNK_SIZE)
+    args = arg_parser.parse_args()
+
+    data = records(args.n)
+    expected = fresh(data)
+    print('{n} records, {cpus} cpus'.format(n=args.n, cpus=os.cpu_count()))
+
+    elapsed = common.best_of(lambda: fresh(data), args.repeat)
+    print('{name:24} {rate:12,.0f} records/s'.format(name='fresh parser per record', rate=args.n / elapsed))
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        assert Batch.parse_many(data, workers=workers, chunk_size=args.chunk_size) == expected
+        elapsed = common.best_of(lambda: Batch.parse_many(data, workers=workers, chunk_size=args.chunk_size),
+                                 args.repeat)
+        print('{name:24} {rate:12,.0f} records/s'.format(name='parse_many workers={w}'.format(w=workers),
+                                                         rate=args.n / elapsed))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
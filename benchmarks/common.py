@@ -0,0 +1,42 @@
+__author__ = 'kid143'
+
+
+"""Shared helpers for the benchmark scripts.
+
+The demo modules import ``base`` as a top level package while
+``MultiRecursiveDescendant`` imports through ``parsing``, so both
+directories are put on the path here.
+"""
+
+import os
+import sys
+import time
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+for path in (ROOT, os.path.join(ROOT, 'parsing')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+
+def drain(lexer, eof):
+    """Pull tokens until eof and return how many were produced"""
+    n = 0
+    while lexer.next_token().token_type != eof:
+        n += 1
+
+    return n
+
+
+def best_of(func, repeat=3):
+    """Return the best wall time of ``repeat`` calls of func"""
+    best = None
+    for i in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+
+    return best
@@ -0,0 +1,72 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Throughput of the recursive parsers against the explicit stack parsers of Iterative.
+
+Parses ``[[[...a...]]]`` (and the dict and assignment equivalents) nested 10,
+1k and 100k deep and reports tokens per second, or the error a recursive
+parser hits (RecursionError past the interpreter limit).
+"""
+
+import argparse
+
+import common
+
+import Backtrack
+import Iterative
+import RecursiveDescendant
+from base import PatternLexer
+
+
+DEPTHS = [10, 1000, 100000]
+
+
+def nested_list(depth):
+    return '[' * depth + 'a' + ']' * depth
+
+def nested_dict(depth):
+    return '{a: ' * depth + 'b' + '}' * depth
+
+def nested_stat(depth):
+    return nested_list(depth) + '=' + nested_list(depth)
+
+
+CASES = [
+    ('list', nested_list, 'RecursiveDescendant.ListParser',
+     lambda text: RecursiveDescendant.ListParser(RecursiveDescendant.ListLexer(text)).list()),
+    ('list', nested_list, 'Iterative.IterativeListParser',
+     lambda text: Iterative.IterativeListParser(RecursiveDescendant.ListLexer(text)).list()),
+    ('dict', nested_dict, 'RecursiveDescendant.DictParser',
+     lambda text: RecursiveDescendant.DictParser(RecursiveDescendant.DictLexer(text)).dict()),
+    ('dict', nested_dict, 'Iterative.IterativeDictParser',
+     lambda text: Iterative.IterativeDictParser(RecursiveDescendant.DictLexer(text)).dict()),
+    ('stat', nested_stat, 'Backtrack.BacktrackParser',
+     lambda text: Backtrack.BacktrackParser(PatternLexer(text)).stat()),
+    ('stat', nested_stat, 'Iterative.IterativeStatParser',
+     lambda text: Iterative.IterativeStatParser(PatternLexer(text)).stat()),
+]
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    print('{0:<6}{1:<34}'.format('', 'tokens/s') + ''.join('{0:>16}'.format(depth) for depth in DEPTHS))
+    for grammar, build, label, parse in CASES:
+        cells = []
+        for depth in DEPTHS:
+            text = build(depth)
+            tokens = len(PatternLexer.pattern.findall(text))
+            try:
+                elapsed = common.best_of(lambda: parse(text), args.repeat)
+                cells.append('{0:>16.0f}'.format(tokens / elapsed))
+            except RecursionError:
+                cells.append('{0:>16}'.format('RecursionError'))
+        print('{0:<6}{1:<34}'.format(grammar, label) + ''.join(cells))
+
+
+if __name__ == '__main__':
+    main()
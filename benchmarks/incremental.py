@@ -0,0 +1,74 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Full re-parse versus Incremental.Document edit + parse.
+
+Two document shapes of growing size get one-name edits in the middle:
+
+* nested: a 10-ary tree of lists, where the edit damages one path and
+  every sibling subtree is a single memo hit;
+* flat: one list of many small lists, where the top level elements loop still
+  visits every sibling (one memo hit each), so re-parse stays linear in the
+  number of top level elements.
+
+Reports the time of a fresh MemoBacktrackParser, of edit() and of the parse
+after it, plus memo hits and re-lexed tokens.
+"""
+
+import argparse
+import time
+
+import common
+
+from Incremental import Document
+from Memorize import MemoBacktrackParser
+from base import PatternLexer
+
+
+def tree(n):
+    if n <= 1:
+        return '[a,b]'
+    return '[' + ','.join(tree(n // 10) for i in range(10)) + ']'
+
+
+def flat(n):
+    return '[' + ','.join(['[a,b=c,[d,e]]'] * n) + ']'
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000])
+    arg_parser.add_argument('--edits', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    print('{shape:7} {n:>7} {tokens:>9} {full:>9} {edit:>9} {parse:>9} {hits:>7} {relexed:>7}'.format(
+        shape='shape', n='n', tokens='tokens', full='full s', edit='edit s', parse='parse s',
+        hits='hits', relexed='relexed'))
+    for shape, make in (('nested', tree), ('flat', flat)):
+        for n in args.sizes:
+            text = make(n)
+            full = timed(lambda: MemoBacktrackParser(PatternLexer(text)).stat())
+            document = Document(text)
+            document.parse()
+            edit = parse = 0.0
+            hits = document.memo.hits
+            for i in range(args.edits):
+                offset = document.text.index('a', len(document.text) // 2 + 40 * i)
+                edit += timed(lambda: document.edit(offset, 1, 'zz'))
+                parse += timed(document.parse)
+            print('{shape:7} {n:7} {tokens:9} {full:9.4f} {edit:9.5f} {parse:9.5f} {hits:7} {relexed:7}'.format(
+                shape=shape, n=n, tokens=len(document.tokens), full=full, edit=edit / args.edits,
+                parse=parse / args.edits, hits=(document.memo.hits - hits) // args.edits,
+                relexed=document.relexed))
+
+
+if __name__ == '__main__':
+    main()
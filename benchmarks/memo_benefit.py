@@ -0,0 +1,110 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Compare BacktrackParser and MemoBacktrackParser on inputs where alternative 1 fails late.
+
+Each workload is an assignment ``<list> = <list>``: stat() first speculates
+``list EOF``, which parses the whole left list before failing on '='; then it
+speculates ``assign EOF`` and finally parses the chosen alternative for real.
+The memoizing parser answers the second speculative parse of the left list
+from its memo table.
+
+BacktrackParser.stat() normally predicts the alternative with a bracket scan
+and never speculates, so the comparison runs it with prediction switched off;
+the predicting parser is listed for reference.
+
+Reports tokens consumed, rule invocations and wall time. With ``--check`` the
+script exits non-zero if memoization stops saving rule invocations over plain
+speculation or if its invocation count grows faster than the input.
+"""
+
+import argparse
+import sys
+
+import common
+
+import Backtrack
+import Memorize
+from base import CounterSink, PatternLexer, RULE_ENTER
+
+
+def nested(depth):
+    return '[' * depth + 'a' + ']' * depth
+
+def wide(width):
+    return '[' + ','.join(['a', 'b=c', '[d,e]'] * width) + ']'
+
+WORKLOADS = [
+    ('deep', nested, [25, 50, 100, 200]),
+    ('wide', wide, [100, 200, 400, 800]),
+    ('deep-of-wide', lambda n: '[' * n + wide(n) + ']' * n, [10, 20, 40, 80]),
+]
+
+class SpeculatingBacktrackParser(Backtrack.BacktrackParser):
+    """BacktrackParser that always falls back to speculation"""
+    def predict_stat(self):
+        return None
+
+
+PARSERS = [
+    ('speculating Backtrack', SpeculatingBacktrackParser),
+    ('MemoBacktrackParser', Memorize.MemoBacktrackParser),
+    ('predicting Backtrack', Backtrack.BacktrackParser),
+]
+
+
+def measure(parser_class, text, repeat):
+    parser = parser_class(PatternLexer(text))
+    sink = CounterSink()
+    parser.set_tracer(sink)
+    consumed = [0]
+    consume = parser.consume
+
+    def counting_consume():
+        consumed[0] += 1
+        consume()
+
+    parser.consume = counting_consume
+    parser.stat()
+
+    elapsed = common.best_of(lambda: parser_class(PatternLexer(text)).stat(), repeat)
+    return consumed[0], sink.counts[RULE_ENTER], elapsed
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--check', action='store_true')
+    args = arg_parser.parse_args()
+    sys.setrecursionlimit(20000)
+
+    failed = False
+    print('{0:<14}{1:>6}  {2:<22}{3:>10}{4:>10}{5:>12}'.format('workload', 'n', 'parser', 'tokens', 'rules', 'ms'))
+    for workload, build, sizes in WORKLOADS:
+        previous = None
+        for n in sizes:
+            text = build(n) + '=' + build(n)
+            calls = {}
+            for label, parser_class in PARSERS:
+                tokens, rules, elapsed = measure(parser_class, text, args.repeat)
+                calls[label] = rules
+                print('{0:<14}{1:>6}  {2:<22}{3:>10}{4:>10}{5:>12.2f}'.format(
+                    workload, n, label, tokens, rules, elapsed * 1000))
+
+            memo = calls['MemoBacktrackParser']
+            if memo >= calls['speculating Backtrack']:
+                print('  memoization saved no rule invocations')
+                failed = True
+            if previous is not None and memo > previous * 2.5:
+                print('  memoized rule invocations grew superlinearly: {0} -> {1}'.format(previous, memo))
+                failed = True
+            previous = memo
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
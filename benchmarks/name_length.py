@@ -0,0 +1,71 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Regression benchmark: lexing a NAME must be linear in its length.
+
+Times every lexer on ``[aaa...a]`` for identifiers from 10 characters up to
+1 MB and reports nanoseconds per character. With ``--check`` the script exits
+non-zero if the per character cost at the largest size grows more than
+``--tolerance`` times over the cost at 10 KB.
+"""
+
+import argparse
+import sys
+
+import common
+
+import Backtrack
+import Memorize
+from base import EOF, PatternLexer
+from parsing import MultiRecursiveDescendant, RecursiveDescendant
+
+
+SIZES = [10, 100, 1000, 10000, 100000, 1000000]
+
+LEXERS = [
+    ('Backtrack.ListLexer', Backtrack.ListLexer, EOF),
+    ('Memorize.ListLexer', Memorize.ListLexer, EOF),
+    ('MultiRecursiveDescendant.ListMultiLexer', MultiRecursiveDescendant.ListMultiLexer, 1),
+    ('RecursiveDescendant.ListLexer', RecursiveDescendant.ListLexer, 1),
+    ('base.PatternLexer', PatternLexer, EOF),
+]
+
+
+def run(sizes, repeat):
+    results = {}
+    for label, lexer_class, eof in LEXERS:
+        row = []
+        for size in sizes:
+            text = '[' + 'a' * size + ']'
+            elapsed = common.best_of(lambda: common.drain(lexer_class(text), eof), repeat)
+            row.append(elapsed * 1e9 / size)
+        results[label] = row
+
+    return results
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    arg_parser.add_argument('--check', action='store_true')
+    arg_parser.add_argument('--tolerance', type=float, default=3.0)
+    args = arg_parser.parse_args()
+
+    results = run(SIZES, args.repeat)
+    print('{0:<42}'.format('ns/char') + ''.join('{0:>10}'.format(size) for size in SIZES))
+    failed = False
+    for label, row in results.items():
+        print('{0:<42}'.format(label) + ''.join('{0:>10.1f}'.format(ns) for ns in row))
+        growth = row[-1] / row[SIZES.index(10000)]
+        if growth > args.tolerance:
+            print('  superlinear: {0:.1f}x per character from 10KB to 1MB'.format(growth))
+            failed = True
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Sequential versus ParallelList parsing of one large generated list.
+
+Reports the pre-scan time, the sequential parse and parallel_parse_list with
+1, 2, 4... workers up to the cpu count, and checks the results are equal.
+"""
+
+import argparse
+import os
+import random
+import time
+
+import common
+
+import ParallelList
+
+
+def element(rng, depth):
+    r = rng.random()
+    if depth < 4 and r < 0.2:
+        return '[' + ','.join(element(rng, depth + 1) for i in range(rng.randint(1, 4))) + ']'
+    return 'ab' if r < 0.6 else 'x=yz'
+
+
+def generate(n, seed=0):
+    rng = random.Random(seed)
+    return ('[' + ', '.join(element(rng, 0) for i in range(n)) + ']').encode('ascii')
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('-n', type=int, default=200000, help='top level elements')
+    arg_parser.add_argument('--chunk-bytes', type=int, default=ParallelList.DEFAULT_CHUNK_BYTES)
+    args = arg_parser.parse_args()
+
+    data = generate(args.n)
+    mb = len(data) / 1e6
+    print('{mb:.1f} MB, {n} elements, {cpus} cpus'.format(mb=mb, n=args.n, cpus=os.cpu_count()))
+
+    _, elapsed = timed(lambda: ParallelList.split_elements(data))
+    print('{name:24} {mbs:8.1f} MB/s'.format(name='pre-scan', mbs=mb / elapsed))
+    expected, elapsed = timed(lambda: ParallelList.parse_list(data))
+    print('{name:24} {mbs:8.1f} MB/s'.format(name='sequential', mbs=mb / elapsed))
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        result, elapsed = timed(lambda: ParallelList.parallel_parse_list(data, workers, args.chunk_bytes))
+        assert result == expected
+        print('{name:24} {mbs:8.1f} MB/s'.format(name='parallel workers={w}'.format(w=workers), mbs=mb / elapsed))
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
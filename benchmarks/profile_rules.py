@@ -0,0 +1,56 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Per rule profile of one engine on one seeded workload.
+
+Attaches a base.Profiler to the parser (see suite.py for the engines and
+workloads.py for the inputs), parses once and prints the summary table:
+calls, inclusive and exclusive time and inclusive tokens consumed per rule,
+speculation and memo counters, and tokens by type from the lexer.
+``--collapsed`` also writes the exclusive time per rule stack in microseconds
+for flamegraph.pl or speedscope.
+
+    python benchmarks/profile_rules.py --engine Memorize.MemoBacktrackParser \\
+        --workload pathological --size 200 --collapsed memo.folded
+"""
+
+import argparse
+import sys
+
+import common
+
+import suite
+import workloads
+from base import Profiler
+
+
+def main():
+    engines = dict((engine.name, engine) for engine in suite.ENGINES)
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    arg_parser.add_argument('--engine', choices=sorted(engines), default='Memorize.MemoBacktrackParser')
+    arg_parser.add_argument('--workload', choices=sorted(workloads.WORKLOADS), default='assignments')
+    arg_parser.add_argument('--size', type=int, default=500)
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--collapsed', help='write collapsed stacks here')
+    args = arg_parser.parse_args()
+
+    sys.setrecursionlimit(20000)
+    engine = engines[args.engine]
+    text = workloads.render(workloads.generate(args.workload, args.size, args.seed), engine.grammar)
+    parser = engine.build(text)
+    profiler = Profiler()
+    profiler.attach(parser)
+    getattr(parser, engine.start)()
+    profiler.detach(parser)
+
+    print('{engine} on {workload} n={size} ({chars} characters)'.format(
+        engine=engine.name, workload=args.workload, size=args.size, chars=len(text)))
+    print(profiler.table())
+    if args.collapsed:
+        profiler.write_collapsed(args.collapsed)
+
+
+if __name__ == '__main__':
+    main()
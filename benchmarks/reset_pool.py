@@ -0,0 +1,80 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Per record cost of building a lexer/parser pair versus reset() and ParserPool.
+
+Each parser parses the same stream of tiny records three ways: a new lexer and
+parser per record, one pair reused through reset(), and ParserPool.acquire()
+/ release(). Reports microseconds per record.
+"""
+
+import argparse
+
+import common
+
+import Iterative
+import MultiRecursiveDescendant
+import RecursiveDescendant
+from Backtrack import BacktrackParser
+from Memorize import MemoBacktrackParser
+from base import ParserPool, PatternLexer
+
+
+# name, records, factory(input), start rule
+SUBJECTS = [
+    ('RecursiveDescendant', ['[a]', '[a,b]', '[a,[b]]'],
+     lambda s: RecursiveDescendant.ListParser(RecursiveDescendant.ListLexer(s)), 'list'),
+    ('MultiRecursiveDescendant', ['[a]', '[a,b=c]', '[a,[b]]'],
+     lambda s: MultiRecursiveDescendant.ListMultiParser(MultiRecursiveDescendant.ListMultiLexer(s), 2), 'list'),
+    ('IterativeStatParser', ['[a]', '[a,b=c]', '[a]=[b]'],
+     lambda s: Iterative.IterativeStatParser(PatternLexer(s)), 'stat'),
+    ('BacktrackParser', ['[a]', '[a,b=c]', '[a]=[b]'],
+     lambda s: BacktrackParser(PatternLexer(s)), 'stat'),
+    ('MemoBacktrackParser', ['[a]', '[a,b=c]', '[a]=[b]'],
+     lambda s: MemoBacktrackParser(PatternLexer(s)), 'stat'),
+]
+
+
+def fresh(records, factory, start):
+    for record in records:
+        getattr(factory(record), start)()
+
+
+def reused(records, factory, start):
+    parser = factory('')
+    rule = getattr(parser, start)
+    for record in records:
+        parser.reset(record)
+        rule()
+
+
+def pooled(records, factory, start):
+    pool = ParserPool(lambda: factory(''))
+    for record in records:
+        parser = pool.acquire(record)
+        try:
+            getattr(parser, start)()
+        finally:
+            pool.release(parser)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('-n', type=int, default=30000, help='records per run')
+    arg_parser.add_argument('--repeat', type=int, default=7)
+    args = arg_parser.parse_args()
+
+    print('{name:26} {fresh:>10} {reset:>10} {pool:>10} {speedup:>8}'.format(
+        name='us/record', fresh='fresh', reset='reset', pool='pool', speedup='speedup'))
+    for name, samples, factory, start in SUBJECTS:
+        records = (samples * (args.n // len(samples) + 1))[:args.n]
+        times = [common.best_of(lambda: run(records, factory, start), args.repeat) / args.n * 1e6
+                 for run in (fresh, reused, pooled)]
+        print('{name:26} {0:10.2f} {1:10.2f} {2:10.2f} {speedup:7.2f}x'.format(
+            *times, name=name, speedup=times[0] / times[1]))
+
+
+if __name__ == '__main__':
+    main()
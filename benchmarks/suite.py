@@ -0,0 +1,250 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Reproducible benchmark suite over every parser engine.
+
+``run`` parses each seeded workload (see workloads.py) with every engine
+and writes one JSON document:
+
+    {"meta": {...}, "results": [{"workload", "size", "engine", "tokens",
+      "seconds", "tokens_per_sec", "peak_bytes", "rule_calls",
+      "speculation_depth", "error"}, ...]}
+
+Time is the best of ``--repeat`` samples, each parsing the input as often as
+fits in ``--min-time`` seconds so tiny inputs are not lost in timer noise.
+Peak memory comes from tracemalloc and
+rule calls and speculation depth from a separate instrumented run, so neither
+slows the timed one. ``compare`` reads two such files and flags every
+engine/workload that got slower or bigger than ``--threshold`` allows, or makes
+more rule calls; it exits non-zero if anything regressed.
+
+    python benchmarks/suite.py run -o before.json
+    python benchmarks/suite.py compare before.json after.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import common
+
+import workloads
+import Backtrack
+import Memorize
+import MultiRecursiveDescendant
+import RecursiveDescendant
+from base import CounterSink, EOF, PatternLexer, RULE_ENTER
+
+
+class Engine(object):
+    """
+    One parser entry point: how to lex the grammar's text and where its EOF is
+    """
+    def __init__(self, name, grammar, lexer_class, eof, parser, start):
+        self.name = name
+        self.grammar = grammar
+        self.lexer_class = lexer_class
+        self.eof = eof
+        self.parser = parser
+        self.start = start
+
+    def build(self, text):
+        return self.parser(self.lexer_class(text))
+
+    def parse(self, text):
+        getattr(self.build(text), self.start)()
+
+
+ENGINES = [
+    Engine('RecursiveDescendant.ListParser', 'list', RecursiveDescendant.ListLexer, 1,
+           RecursiveDescendant.ListParser, 'list'),
+    Engine('RecursiveDescendant.DictParser', 'dict', RecursiveDescendant.DictLexer, 1,
+           RecursiveDescendant.DictParser, 'dict'),
+    Engine('MultiRecursiveDescendant.ListMultiParser', 'multi', MultiRecursiveDescendant.ListMultiLexer, 1,
+           lambda lexer: MultiRecursiveDescendant.ListMultiParser(lexer, 2), 'list'),
+    Engine('Backtrack.BacktrackParser', 'stat', PatternLexer, EOF, Backtrack.BacktrackParser, 'stat'),
+    Engine('Memorize.MemoBacktrackParser', 'stat', PatternLexer, EOF, Memorize.MemoBacktrackParser, 'stat'),
+]
+
+
+def count_rules(parser, engine):
+    """Parse once with instrumentation and return (rule calls, deepest speculation)"""
+    if hasattr(parser, 'set_tracer'):
+        sink = CounterSink()
+        parser.set_tracer(sink)
+        getattr(parser, engine.start)()
+        return sink.counts[RULE_ENTER], sink.max_depth
+
+    calls = [0]
+
+    def counted(rule):
+        def wrapper(*args):
+            calls[0] += 1
+            return rule(*args)
+        return wrapper
+
+    for name in parser.rules:
+        setattr(parser, name, counted(getattr(parser, name)))
+    getattr(parser, engine.start)()
+    return calls[0], 0
+
+
+def parse_time(engine, text, repeat, min_time):
+    """Best per parse time over repeat samples of at least min_time seconds each"""
+    loops = 1
+    while True:
+        elapsed = common.best_of(lambda: [engine.parse(text) for i in range(loops)], 1)
+        if elapsed >= min_time:
+            break
+        loops *= 2
+
+    return min(elapsed, common.best_of(lambda: [engine.parse(text) for i in range(loops)], repeat)) / loops
+
+
+def peak_memory(engine, text):
+    tracemalloc.start()
+    try:
+        engine.parse(text)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def measure(engine, workload, size, text, repeat, min_time):
+    result = {
+        'workload': workload,
+        'size': size,
+        'engine': engine.name,
+        'tokens': common.drain(engine.lexer_class(text), engine.eof) + 1,
+        'seconds': None,
+        'tokens_per_sec': None,
+        'peak_bytes': None,
+        'rule_calls': None,
+        'speculation_depth': None,
+        'error': None,
+    }
+    try:
+        seconds = parse_time(engine, text, repeat, min_time)
+        result['seconds'] = seconds
+        result['tokens_per_sec'] = result['tokens'] / seconds if seconds else None
+        result['peak_bytes'] = peak_memory(engine, text)
+        result['rule_calls'], result['speculation_depth'] = count_rules(engine.build(text), engine)
+    except (Exception, RecursionError) as e:
+        result['error'] = '{kind}: {message}'.format(kind=type(e).__name__, message=e)
+
+    return result
+
+
+def run(args):
+    sys.setrecursionlimit(args.recursion_limit)
+    engines = [engine for engine in ENGINES if not args.engines or engine.name in args.engines]
+    results = []
+    for workload in args.workloads or sorted(workloads.WORKLOADS):
+        builder, sizes = workloads.WORKLOADS[workload]
+        for size in args.sizes or sizes:
+            model = workloads.generate(workload, size, args.seed)
+            for engine in engines:
+                result = measure(engine, workload, size, workloads.render(model, engine.grammar),
+                                 args.repeat, args.min_time)
+                results.append(result)
+                sys.stderr.write('{workload:<13}{size:>7}  {engine:<42}{rate}\n'.format(
+                    workload=workload, size=size, engine=engine.name,
+                    rate=result['error'] or '{0:12,.0f} tokens/s'.format(result['tokens_per_sec'])))
+
+    report = {
+        'meta': {
+            'seed': args.seed,
+            'repeat': args.repeat,
+            'min_time': args.min_time,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'machine': platform.machine(),
+            'date': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        },
+        'results': results,
+    }
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        json.dump(report, output, indent=1)
+        output.write('\n')
+    finally:
+        if args.output:
+            output.close()
+
+
+def regressions(old, new, threshold):
+    """Yield (key, message) for every result of new that is worse than in old"""
+    before = dict(((r['workload'], r['size'], r['engine']), r) for r in old['results'])
+    for r in new['results']:
+        key = (r['workload'], r['size'], r['engine'])
+        b = before.get(key)
+        if b is None:
+            continue
+        if r['error'] and not b['error']:
+            yield key, 'now fails: {0}'.format(r['error'])
+            continue
+        if r['error'] or b['error']:
+            continue
+        if r['tokens_per_sec'] < b['tokens_per_sec'] * (1 - threshold):
+            yield key, 'tokens/s {0:,.0f} -> {1:,.0f}'.format(b['tokens_per_sec'], r['tokens_per_sec'])
+        if r['peak_bytes'] > b['peak_bytes'] * (1 + threshold):
+            yield key, 'peak bytes {0:,} -> {1:,}'.format(b['peak_bytes'], r['peak_bytes'])
+        if r['rule_calls'] > b['rule_calls']:
+            yield key, 'rule calls {0:,} -> {1:,}'.format(b['rule_calls'], r['rule_calls'])
+        if r['speculation_depth'] > b['speculation_depth']:
+            yield key, 'speculation depth {0} -> {1}'.format(b['speculation_depth'], r['speculation_depth'])
+
+
+def compare(args):
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    if old['meta'].get('seed') != new['meta'].get('seed'):
+        print('warning: runs used different seeds, inputs differ')
+    found = False
+    for (workload, size, engine), message in regressions(old, new, args.threshold):
+        print('REGRESSION {workload} {size} {engine}: {message}'.format(
+            workload=workload, size=size, engine=engine, message=message))
+        found = True
+
+    if not found:
+        print('no regressions beyond {0:.0%}'.format(args.threshold))
+    return 1 if found else 0
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = arg_parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='run the suite and write JSON')
+    run_parser.add_argument('--seed', type=int, default=0)
+    run_parser.add_argument('--repeat', type=int, default=3)
+    run_parser.add_argument('--min-time', type=float, default=0.1, help='seconds per timing sample')
+    run_parser.add_argument('--workloads', nargs='+', choices=sorted(workloads.WORKLOADS))
+    run_parser.add_argument('--engines', nargs='+', choices=[engine.name for engine in ENGINES])
+    run_parser.add_argument('--sizes', type=int, nargs='+', help='override every workload\'s default sizes')
+    run_parser.add_argument('--recursion-limit', type=int, default=20000)
+    run_parser.add_argument('-o', '--output', help='write JSON here instead of stdout')
+
+    compare_parser = commands.add_parser('compare', help='flag regressions between two runs')
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.10,
+                                help='allowed relative loss in tokens/s and growth in peak memory')
+
+    args = arg_parser.parse_args()
+    if args.command == 'run':
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+#! /usr/bin/env python3
+
+__author__ = 'kid143'
+
+
+"""Benchmark the shared token windows against the implementations they replaced.
+
+The legacy classes below are copies of the lookahead handling that used to live
+in MultiRecursiveDescendant.Parser (modulo ring buffer) and in
+Backtrack.Parser / Memorize.Parser (growable list). Every window replays the same
+pre-lexed token stream, so only the buffering cost is measured.
+"""
+
+import argparse
+
+import common
+
+from base import Token, EOF, NAME, COMMA, LookaheadWindow, SpeculationWindow
+
+
+class ReplayLexer(object):
+    """Hands out a pre-built token list, then EOF forever"""
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.i = 0
+        self.eof = Token(EOF, 'n/a')
+
+    def next_token(self):
+        i = self.i
+        if i < len(self.tokens):
+            self.i = i + 1
+            return self.tokens[i]
+
+        return self.eof
+
+
+class LegacyRing(object):
+    """MultiRecursiveDescendant.Parser before the shared window"""
+    def __init__(self, input_lexer, k):
+        self.lexer = input_lexer
+        self.lookahead = []
+        self.k = k
+        self.p = 0
+        for i in range(k):
+            self.consume()
+
+    def lt(self, i):
+        return self.lookahead[(self.p + i - 1) % self.k]
+
+    def la(self, i):
+        return self.lt(i).token_type
+
+    def consume(self):
+        if len(self.lookahead) > self.p:
+            self.lookahead[self.p] = self.lexer.next_token()
+        else:
+            self.lookahead.append(self.lexer.next_token())
+        self.p = (self.p + 1) % self.k
+
+
+class LegacyGrowable(object):
+    """Backtrack.Parser / Memorize.Parser before the shared window"""
+    def __init__(self, input_lexer):
+        self.lexer = input_lexer
+        self.lookahead = []
+        self.markers = []
+        self.p = 0
+
+    def lt(self, i):
+        self.sync(i)
+        return self.lookahead[self.p+i-1]
+
+    def la(self, i):
+        return self.lt(i).token_type
+
+    def sync(self, i):
+        if self.p + i - 1 > (len(self.lookahead) - 1):
+            n = self.p + i - 1 - (len(self.lookahead) - 1)
+            self.fill(n)
+
+    def fill(self, n):
+        ex = [self.lexer.next_token() for x in range(n)]
+        self.lookahead.extend(ex)
+
+    def consume(self):
+        self.p += 1
+        if self.p == len(self.lookahead) and not self.is_speculating:
+            self.p = 0
+            self.lookahead.clear()
+
+        self.sync(1)
+
+    def mark(self):
+        self.markers.append(self.p)
+        return self.p
+
+    def release(self):
+        self.p = self.markers.pop()
+
+    @property
+    def is_speculating(self):
+        return len(self.markers) > 0
+
+
+class Window(SpeculationWindow):
+    k = 2
+
+
+def walk(window):
+    """The access pattern of element(): la(1), la(2), consume"""
+    la = window.la
+    consume = window.consume
+    while la(1) != EOF:
+        la(2)
+        consume()
+
+
+def speculate(window):
+    """One speculative pass over the whole input, then the real pass"""
+    window.mark()
+    walk(window)
+    window.release()
+    walk(window)
+
+
+def main():
+    arg_parser = argparse.ArgumentParser(description=__doc__)
+    arg_parser.add_argument('--tokens', type=int, default=200000)
+    arg_parser.add_argument('--repeat', type=int, default=3)
+    args = arg_parser.parse_args()
+
+    tokens = [Token(NAME if i % 2 else COMMA, 'a') for i in range(args.tokens)]
+
+    cases = [
+        ('LL(2) walk', 'legacy modulo ring', lambda: walk(LegacyRing(ReplayLexer(tokens), 2))),
+        ('LL(2) walk', 'LookaheadWindow', lambda: walk(LookaheadWindow(ReplayLexer(tokens), 2))),
+        ('LL(3) walk', 'legacy modulo ring', lambda: walk(LegacyRing(ReplayLexer(tokens), 3))),
+        ('LL(3) walk', 'LookaheadWindow', lambda: walk(LookaheadWindow(ReplayLexer(tokens), 3))),
+        ('plain walk', 'legacy growable list', lambda: walk(LegacyGrowable(ReplayLexer(tokens)))),
+        ('plain walk', 'SpeculationWindow', lambda: walk(Window(ReplayLexer(tokens)))),
+        ('speculate', 'legacy growable list', lambda: speculate(LegacyGrowable(ReplayLexer(tokens)))),
+        ('speculate', 'SpeculationWindow', lambda: speculate(Window(ReplayLexer(tokens)))),
+    ]
+    for workload, label, func in cases:
+        elapsed = common.best_of(func, args.repeat)
+        print('{0:<12}{1:<24}{2:>10.1f} ns/token'.format(workload, label, elapsed * 1e9 / args.tokens))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+__author__ = 'kid143'
+
+
+"""Seeded synthetic inputs for the benchmark suite.
+
+A workload builds a small tree model from ``random.Random(seed)``:
+``('name', s)``, ``('assign', a, b)`` or ``('list', children)``, plus an
+optional right hand side for a top level assignment. The renderers turn one
+model into the text each grammar accepts, so every engine parses the same
+shape:
+
+* ``list``  RecursiveDescendant lists, assignments rendered as their target;
+* ``multi`` ListMultiParser lists with ``a=b`` elements;
+* ``stat``  the backtracking stat grammar, ``list`` or ``list = list``;
+* ``dict``  RecursiveDescendant dicts, one pair per element.
+"""
+
+import random
+import string
+
+
+def name(rng):
+    return ('name', ''.join(rng.choice(string.ascii_lowercase) for i in range(rng.randint(1, 6))))
+
+
+def element(rng, assign_ratio=0.2):
+    if rng.random() < assign_ratio:
+        return ('assign', name(rng)[1], name(rng)[1])
+    return name(rng)
+
+
+def flat(n, rng):
+    """One list of n names and assignments"""
+    return ('list', [element(rng) for i in range(n)]), None
+
+
+def wide(n, rng):
+    """n small lists of 1-8 elements each in one list"""
+    return ('list', [('list', [element(rng) for j in range(rng.randint(1, 8))]) for i in range(n)]), None
+
+
+def deep(n, rng):
+    """A spine nested n levels deep with a few elements beside every level"""
+    node = ('list', [element(rng)])
+    for i in range(n - 1):
+        node = ('list', [element(rng) for j in range(rng.randint(0, 2))] + [node])
+    return node, None
+
+
+def assignments(n, rng):
+    """A top level assignment of two lists of n mostly ``a=b`` elements"""
+    return (('list', [element(rng, 0.9) for i in range(n)]),
+            ('list', [element(rng, 0.9) for i in range(n)]))
+
+
+def pathological(n, rng):
+    """``[[...[a]...]] = [b]``: stat() fails its first alternative only after the
+       whole n deep left list"""
+    node = ('list', [name(rng)])
+    for i in range(n - 1):
+        node = ('list', [node])
+    return node, ('list', [name(rng)])
+
+
+# name -> (builder, default sizes)
+WORKLOADS = {
+    'flat': (flat, [1000, 10000]),
+    'wide': (wide, [200, 2000]),
+    'deep': (deep, [50, 400]),
+    'assignments': (assignments, [500, 5000]),
+    'pathological': (pathological, [50, 400]),
+}
+
+
+def generate(workload, n, seed=0):
+    """Return the (tree, right hand side) model of workload at size n"""
+    builder, sizes = WORKLOADS[workload]
+    return builder(n, random.Random('{seed}/{workload}/{n}'.format(seed=seed, workload=workload, n=n)))
+
+
+def render_list(node, assignments=False):
+    kind = node[0]
+    if kind == 'name':
+        return node[1]
+    if kind == 'assign':
+        return '{0}={1}'.format(node[1], node[2]) if assignments else node[1]
+    return '[' + ','.join(render_list(child, assignments) for child in node[1]) + ']'
+
+
+def render_dict(node):
+    pairs = []
+    for i, child in enumerate(node[1]):
+        kind = child[0]
+        if kind == 'name':
+            pairs.append('k{0}: {1}'.format(i, child[1]))
+        elif kind == 'assign':
+            pairs.append('{0}: {1}'.format(child[1], child[2]))
+        else:
+            pairs.append('k{0}: {1}'.format(i, render_dict(child)))
+    return '{' + ', '.join(pairs) + '}'
+
+
+def render(model, grammar):
+    tree, value = model
+    if grammar == 'list':
+        return render_list(tree)
+    if grammar == 'multi':
+        return render_list(tree, True)
+    if grammar == 'dict':
+        return render_dict(tree)
+    if grammar == 'stat':
+        text = render_list(tree, True)
+        if value is not None:
+            text += '=' + render_list(value, True)
+        return text
+    raise ValueError('unknown grammar {0!r}'.format(grammar))
@@ -0,0 +1,323 @@
+__author__ = 'kid143'
+
+
+"""asyncio front end: parse list and stat records straight off a StreamReader.
+
+The records on a connection are written one after another, e.g.
+``[a, b=c] = [d] [e, [f]]``. AsyncLexer tokenizes whatever bytes have arrived
+and RecordParser is pushed one token at a time, so a coroutine only awaits
+on ``reader.read()`` and never hands a half received record to a thread. All
+tokens of a chunk are lexed and parsed in one go, then the driver yields to
+the event loop, so one busy connection cannot starve the others.
+
+A record without ``=`` is only known to be complete when the next token (or
+the end of the stream) arrives.
+"""
+
+import asyncio
+import codecs
+
+from base import *
+
+
+DEFAULT_CHUNK_SIZE = 1 << 14
+
+# RecordParser states
+RECORD = 0
+ELEMENT = 1
+AFTER_NAME = 2
+ASSIGN_VALUE = 3
+AFTER_ELEMENT = 4
+AFTER_TARGET = 5
+DONE = 6
+
+GRAMMARS = ('stat', 'list')
+
+
+class AsyncLexer(PatternLexer):
+    """
+    PatternLexer fed from an asyncio.StreamReader.
+
+    ``await fill()`` appends the next chunk to ``input_string``, dropping the
+    text already lexed; ``spans()`` then yields (type, start, end) for every
+    token complete in the buffer. A NAME or the EOF match reaching the end of
+    the buffer is held back until more data or the end of the stream shows
+    where it stops. Offsets are absolute, as in StreamLexer.
+    """
+    def __init__(self, reader, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.reset(reader)
+
+    def reset(self, reader):
+        self.reader = reader
+        self.decoder = codecs.getincrementaldecoder(self.encoding)()
+        self.input_string = ''
+        self.offset = 0
+        self.i = 0
+        self.exhausted = False
+
+    @property
+    def p(self):
+        return self.offset + self.i
+
+    @property
+    def c(self):
+        if self.i < len(self.input_string):
+            return self.input_string[self.i]
+        return None
+
+    def advance(self):
+        self.i += 1
+
+    def ws(self):
+        self.i = self.ws_pattern.match(self.input_string, self.i).end()
+
+    async def fill(self):
+        """Read the next chunk. Return False once the stream is exhausted."""
+        if self.exhausted:
+            return False
+
+        data = await self.reader.read(self.chunk_size)
+        if not data:
+            self.exhausted = True
+        self.offset += self.i
+        self.input_string = self.input_string[self.i:] + self.decoder.decode(data, self.exhausted)
+        self.i = 0
+        return not self.exhausted
+
+    def spans(self):
+        text = self.input_string
+        n = len(text)
+        match = self.pattern.match
+        group_types = self.group_types
+        while True:
+            m = match(text, self.i)
+            if m is None:
+                self.ws()
+                raise self.parse_error('invalid character {c!r} at {pos}'.format(c=self.c, pos=self.p))
+
+            group = m.lastindex
+            token_type = group_types[group]
+            if m.end() == n and not self.exhausted and (token_type == self.name_type or token_type == self.eof_type):
+                return
+
+            self.i = m.end()
+            yield token_type, self.offset + m.start(group), self.offset + m.end(group)
+            if token_type == self.eof_type:
+                return
+
+    def text(self, start, end):
+        return self.input_string[start - self.offset:end - self.offset]
+
+    def next_span(self):
+        raise ParseError('AsyncLexer is read through fill() and spans()')
+
+    next_token = next_span
+
+
+class RecordParser(object):
+    """
+    Push parser for a sequence of records.
+
+    ``feed(token_type, text, start)`` advances the state machine by one token
+    and appends (event, text) pairs to ``events``, ending each record with
+    END_RECORD; with a builder the built value of each record goes to
+    ``records`` instead. The caller takes both lists as it likes. The ``stat``
+    grammar is Backtrack's ``list ('=' list)?`` with ``NAME '=' NAME``
+    elements; ``list`` records are bare lists of names and lists.
+    """
+    def __init__(self, grammar='stat', builder=None):
+        if grammar not in GRAMMARS:
+            raise ValueError('unknown grammar {name!r}'.format(name=grammar))
+
+        self.assignments = grammar == 'stat'
+        self.builder = builder
+        self.reset()
+
+    def reset(self):
+        self.events = []
+        self.records = []
+        self.state = RECORD
+        self.depth = 0
+        self.in_value = False
+        # when building: item lists of the open lists, the record's target
+        # and the name of a pending NAME '=' NAME
+        self.stack = []
+        self.target = None
+        self.assign_target = None
+
+    def error(self, token_type, start):
+        self.state = DONE
+        found = 'end of stream' if token_type == EOF else TOKEN_NAMES[token_type]
+        raise ParseError('unexpected {fnd} at {pos}'.format(fnd=found, pos=start))
+
+    def open_list(self):
+        self.depth += 1
+        self.events.append((START_LIST, '['))
+        if self.builder is not None:
+            self.stack.append([])
+        self.state = ELEMENT
+
+    def add_item(self, item):
+        if self.builder is not None:
+            self.stack[-1].append(item)
+
+    def end_record(self, value):
+        self.events.append((END_RECORD, ''))
+        if self.builder is not None:
+            self.records.append(value)
+        self.in_value = False
+        self.target = None
+        self.state = RECORD
+
+    def feed(self, token_type, text, start):
+        state = self.state
+        builder = self.builder
+        if state == AFTER_NAME:
+            if token_type == EQUALS:
+                self.events.append((ASSIGN, '='))
+                self.state = ASSIGN_VALUE
+                return
+            self.add_item(self.assign_target)
+            state = self.state = AFTER_ELEMENT
+        elif state == AFTER_TARGET:
+            if token_type == EQUALS:
+                self.events.append((ASSIGN, '='))
+                self.in_value = True
+                self.state = RECORD
+                return
+            self.end_record(self.target)
+            state = RECORD
+
+        if state == ELEMENT:
+            if token_type == NAME:
+                self.events.append((NAME_EVENT, text))
+                name = builder.name(Token(NAME, text, start)) if builder is not None else None
+                if self.assignments:
+                    self.assign_target = name
+                    self.state = AFTER_NAME
+                else:
+                    self.add_item(name)
+                    self.state = AFTER_ELEMENT
+            elif token_type == LSQRTBRACKET:
+                self.open_list()
+            else:
+                self.error(token_type, start)
+        elif state == AFTER_ELEMENT:
+            if token_type == COMMA:
+                self.state = ELEMENT
+            elif token_type == RSQRTBRACKET:
+                self.close_list()
+            else:
+                self.error(token_type, start)
+        elif state == ASSIGN_VALUE:
+            if token_type != NAME:
+                self.error(token_type, start)
+            self.events.append((NAME_EVENT, text))
+            if builder is not None:
+                self.add_item(builder.assignment(self.assign_target, builder.name(Token(NAME, text, start))))
+            self.state = AFTER_ELEMENT
+        elif state == RECORD:
+            if token_type == LSQRTBRACKET:
+                self.open_list()
+            elif token_type == EOF and not self.in_value:
+                self.state = DONE
+            else:
+                self.error(token_type, start)
+        else:
+            self.error(token_type, start)
+
+    def close_list(self):
+        self.depth -= 1
+        self.events.append((END_LIST, ']'))
+        value = self.builder.list(self.stack.pop()) if self.builder is not None else None
+        if self.depth:
+            self.add_item(value)
+            self.state = AFTER_ELEMENT
+        elif self.in_value:
+            self.end_record(self.builder.assignment(self.target, value) if self.builder is not None else None)
+        elif self.assignments:
+            self.target = value
+            self.state = AFTER_TARGET
+        else:
+            self.end_record(value)
+
+
+async def iter_batches(reader, parser, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Feed parser from reader and yield it after every chunk; the caller
+       takes parser.events / parser.records before the next one. A ParseError
+       is raised after the batch holding what was parsed before it.
+    """
+    lexer = AsyncLexer(reader, chunk_size)
+    feed = parser.feed
+    more = True
+    while more:
+        more = await lexer.fill()
+        try:
+            for token_type, start, end in lexer.spans():
+                feed(token_type, lexer.text(start, end) if token_type == NAME else None, start)
+        except ParseError:
+            # hand out the records completed before the error first
+            yield parser
+            raise
+        yield parser
+        # a chunk that was already buffered did not suspend read()
+        await asyncio.sleep(0)
+
+
+async def iter_events(reader, grammar='stat', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (event, text) pairs for the records on reader as they arrive"""
+    parser = RecordParser(grammar)
+    async for batch in iter_batches(reader, parser, chunk_size):
+        events = batch.events
+        batch.events = []
+        for event in events:
+            yield event
+
+
+async def iter_records(reader, grammar='stat', builder=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the built value of every record on reader, NativeBuilder values by default"""
+    parser = RecordParser(grammar, builder if builder is not None else NativeBuilder())
+    async for batch in iter_batches(reader, parser, chunk_size):
+        records = batch.records
+        batch.records = []
+        del batch.events[:]
+        for record in records:
+            yield record
+
+
+async def demo():
+    received = []
+
+    async def handle(reader, writer):
+        try:
+            async for record in iter_records(reader):
+                received.append(record)
+        except ParseError as e:
+            received.append(e)
+        writer.close()
+
+    async def send(port, chunks):
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        for chunk in chunks:
+            writer.write(chunk)
+            await writer.drain()
+        writer.close()
+        await writer.wait_closed()
+
+    server = await asyncio.start_server(handle, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        await asyncio.gather(
+            send(port, [b'[a, b=c] = [d', b'ef] [g, [h', b'i]]']),
+            send(port, [b'[x]=[y] [z, ', b'!]']))
+        while len(received) < 4:
+            await asyncio.sleep(0.01)
+
+    for record in received:
+        print(record)
+
+
+if __name__ == '__main__':
+    asyncio.run(demo())
@@ -8,201 +8,243 @@ class ListLexer(Lexer):
     """
     ListLexer
     """
-    def __init__(self, input_string):
-        Lexer.__init__(self, input_string)
+    literals = {
+        ',': COMMA,
+        '[': LSQRTBRACKET,
+        ']': RSQRTBRACKET,
+        '=': EQUALS
+    }
 
-    def ws(self):
-        while self.c in EMPTY:
-            self.advance()
 
-    def is_letter(self):
-        return 'a' <= self.c <= 'z' or 'A' <= self.c <= 'Z'
-
-    def letter(self):
-        if self.is_letter():
-            self.consume()
-
-    def next_token(self):
-        def comma():
-            self.consume()
-            return Token(COMMA, ',')
-
-        def lbracket():
-            self.consume()
-            return Token(LSQRTBRACKET, '[')
-
-        def rbracket():
-            self.consume()
-            return Token(RSQRTBRACKET, ']')
-
-        def equals():
-            self.consume()
-            return Token(EQUALS, '=')
-
-        case_dict = {
-            ' ': self.ws,
-            '\t': self.ws,
-            '\r': self.ws,
-            '\n': self.ws,
-            ',': comma,
-            '[': lbracket,
-            ']': rbracket,
-            '=': equals
-        }
-
-        def name_token():
-            s = self.c
-            while self.is_letter():
-                self.consume()
-                s = ''.join([s, self.c])
-
-            return Token(NAME, s)
-
-        while self.c is not None:
-            try:
-                token_func = case_dict[self.c]
-            except KeyError:
-                token_func = name_token
-
-            if token_func == self.ws:
-                self.ws()
-                continue
-            else:
-                return token_func()
-
-        return Token(EOF, TOKEN_NAMES[EOF])
-
-
-class Parser(object):
+class Parser(SpeculationWindow, TracedParser, BuildingParser, RecoveringParser):
     """
     Parser
     """
-    def __init__(self, input_lexer):
-        self.lexer = input_lexer
-        self.lookahead = []
-        self.markers = []
-        self.p = 0
-
-    def lt(self, i):
-        self.sync(i)
-        return self.lookahead[self.p+i-1]
-
-    def la(self, i):
-        return self.lt(i).token_type
-
     def match(self, x):
         if self.la(1) == x:
             self.consume()
         else:
-            raise ParseError('expecting {exp} found {fnd} at {pos}'.format(
+            self.error('expecting {exp} found {fnd} at {pos}'.format(
                 exp=TOKEN_NAMES[x],
                 fnd=self.lt(1),
                 pos=self.lexer.p)
             )
 
-    def sync(self, i):
-        if self.p + i - 1 > (len(self.lookahead) - 1):
-            n = self.p + i - 1 - (len(self.lookahead) - 1)
-            self.fill(n)
-
-    def fill(self, n):
-        ex = [self.lexer.next_token() for x in range(n)]
-        self.lookahead.extend(ex)
-
-    def consume(self):
-        self.p += 1
-        if self.p == len(self.lookahead) and not self.is_speculating:
-            self.p = 0
-            self.lookahead.clear()
-
-        self.sync(1)
-
-    def mark(self):
-        self.markers.append(self.p)
-        return self.p
-
-    def release(self):
-        marker = self.markers[len(self.markers)-1]
-        self.markers.pop()
-        self.seek(marker)
-
-    def seek(self, index):
-        self.p = index
-
-    @property
-    def is_speculating(self):
-        return len(self.markers) > 0
-
 
 class BacktrackParser(Parser):
     """
     Backtrack Parser
     """
-    def __init__(self, input_lexer):
-        Parser.__init__(self, input_lexer)
+    k = 2
+    rules = ('stat', 'list', 'assign', 'elements', 'element')
+
+    def __init__(self, input_lexer, lookahead=None, builder=None, recover=False):
+        """With recover=True syntax and lexer errors are collected in ``errors``
+           and parsing resumes at the next element instead of raising
+        """
+        self.recover = recover
+        self.errors = []
+        if recover:
+            input_lexer = RecoveringLexer(input_lexer, self.errors)
+        Parser.__init__(self, input_lexer, lookahead)
+        self.builder = builder
+
+    def reset(self, input_string):
+        del self.errors[:]
+        Parser.reset(self, input_string)
 
     def stat(self):
-        if self.speculate_stat_alt1():
-            self.list()
+        if self.recover:
+            return self.recover_stat()
+
+        alt = self.predict_stat()
+        if alt == 1 or (alt is None and self.speculate_stat_alt1()):
+            value = self.list()
             self.match(EOF)
-        elif self.speculate_stat_alt2():
-            self.assign()
+        elif alt == 2 or (alt is None and self.speculate_stat_alt2()):
+            value = self.assign()
             self.match(EOF)
         else:
             raise ParseError('expecting stat found {fnd} at {pos}'.format(fnd=self.lt(1), pos=self.lexer.p))
 
+        return value
+
+    def recover_stat(self):
+        """stat without predicting or speculating: a list, then an assignment if
+           '=' follows it, so recovery reads every token once and the window
+           stays compacted
+        """
+        value = self.list()
+        if self.la(1) == EQUALS:
+            self.consume()
+            target, value = value, self.list()
+            if self.building:
+                value = self.builder.assignment(target, value)
+        self.match(EOF)
+        # lexer errors are found up to k tokens ahead of the parser's
+        self.errors.sort(key=lambda record: record.offset)
+        return value
+
+    def predict_stat(self):
+        """Choose the stat alternative without parsing: count brackets up to the one
+           closing the first list and look at the token after it, EOF for
+           alternative 1 and EQUALS for alternative 2. Return None when the scan
+           cannot tell, so stat() falls back to speculation.
+        """
+        if self.la(1) != LSQRTBRACKET:
+            return None
+
+        depth = 0
+        i = 1
+        while True:
+            token_type = self.la(i)
+            if token_type == LSQRTBRACKET:
+                depth += 1
+            elif token_type == RSQRTBRACKET:
+                depth -= 1
+                if depth == 0:
+                    break
+            elif token_type == EOF:
+                return None
+            i += 1
+
+        token_type = self.la(i + 1)
+        if token_type == EOF:
+            return 1
+        if token_type == EQUALS:
+            return 2
+        return None
+
     def speculate_stat_alt1(self):
         success = True
         self.mark()
+        if self.tracer is not None:
+            self.tracer.event(SPECULATE_START, 'stat_alt1', self.index())
         try:
             self.list()
             self.match(EOF)
         except ParseError:
-
             success = False
 
+        if self.tracer is not None:
+            self.tracer.event(SPECULATE_SUCCESS if success else SPECULATE_FAIL, 'stat_alt1', self.index())
         self.release()
         return success
 
     def speculate_stat_alt2(self):
         success = True
         self.mark()
+        if self.tracer is not None:
+            self.tracer.event(SPECULATE_START, 'stat_alt2', self.index())
         try:
             self.assign()
             self.match(EOF)
         except ParseError:
             success = False
 
+        if self.tracer is not None:
+            self.tracer.event(SPECULATE_SUCCESS if success else SPECULATE_FAIL, 'stat_alt2', self.index())
         self.release()
         return success
 
     def list(self):
         self.match(LSQRTBRACKET)
-        self.elements()
+        items = self.elements()
         self.match(RSQRTBRACKET)
+        if self.building:
+            return self.builder.list(items)
 
     def elements(self):
-        self.element()
-        while self.la(1) == COMMA:
-            self.match(COMMA)
-            self.element()
+        # values are only kept when building, so validating a long list keeps
+        # no per element state
+        items = [self.element()]
+        building = self.building
+        while True:
+            if self.la(1) == COMMA:
+                self.match(COMMA)
+                item = self.element()
+                if building:
+                    items.append(item)
+            elif self.recovering and self.la(1) not in (RSQRTBRACKET, EOF):
+                self.error('expecting COMMA or RSQRTBRACKET found {fnd}'.format(fnd=self.lt(1)))
+                self.resync((COMMA, RSQRTBRACKET))
+            else:
+                break
+
+        return items
 
     def element(self):
         if self.la(1) == NAME and self.la(2) == EQUALS:
-            self.match(NAME)
+            target = self.name()
             self.match(EQUALS)
-            self.match(NAME)
+            value = self.name()
+            if self.building:
+                return self.builder.assignment(target, value)
         elif self.la(1) == NAME:
-            self.match(NAME)
+            return self.name()
         elif self.la(1) == LSQRTBRACKET:
-            self.list()
+            return self.list()
         else:
-            raise ParseError('expecting assign, NAME or list found {fnd}'.format(fnd=self.lt(1)))
+            self.error('expecting assign, NAME or list found {fnd}'.format(fnd=self.lt(1)))
+            self.resync((COMMA, RSQRTBRACKET))
+
+    def name(self):
+        token = self.lt(1)
+        self.match(NAME)
+        if self.building and token.token_type == NAME:
+            return self.builder.name(token)
 
     def assign(self):
-        self.list()
+        target = self.list()
         self.match(EQUALS)
-        self.list()
+        value = self.list()
+        if self.building:
+            return self.builder.assignment(target, value)
+
+    def iter_stat(self):
+        """Yield (event, text) pairs for one stat as its tokens are consumed.
+
+           Nothing is built and nothing is speculated: ASSIGN is yielded between
+           the target and the value once the '=' is seen.
+        """
+        yield from self.iter_list()
+        if self.la(1) == EQUALS:
+            self.consume()
+            yield ASSIGN, '='
+            yield from self.iter_list()
+
+        self.match(EOF)
+
+    def iter_list(self):
+        self.match(LSQRTBRACKET)
+        yield START_LIST, '['
+        depth = 1
+        expect_element = True
+        while depth:
+            if expect_element:
+                if self.la(1) == LSQRTBRACKET:
+                    self.consume()
+                    depth += 1
+                    yield START_LIST, '['
+                    continue
+
+                token = self.lt(1)
+                self.match(NAME)
+                yield NAME_EVENT, token.string
+                if self.la(1) == EQUALS:
+                    self.consume()
+                    yield ASSIGN, '='
+                    token = self.lt(1)
+                    self.match(NAME)
+                    yield NAME_EVENT, token.string
+                expect_element = False
+            elif self.la(1) == COMMA:
+                self.consume()
+                expect_element = True
+            else:
+                self.match(RSQRTBRACKET)
+                depth -= 1
+                yield END_LIST, ']'
 
 
 if __name__ == '__main__':
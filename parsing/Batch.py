@@ -0,0 +1,110 @@
+__author__ = 'kid143'
+
+
+"""Parse many small independent inputs, optionally across processes.
+
+Every worker process keeps one lexer/parser pair per grammar and calls
+``reset()`` on it for each record, so no per-record objects are built apart
+from the result. Records are shipped in chunks to amortise the pickling cost.
+"""
+
+import itertools
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from base import *
+from Backtrack import BacktrackParser
+from Memorize import MemoBacktrackParser
+import RecursiveDescendant
+from RecursiveDescendant import ListLexer, ListParser, DictLexer, DictParser
+
+
+GRAMMARS = {
+    'stat': (lambda: MemoBacktrackParser(PatternLexer(''), builder=NativeBuilder()), 'stat'),
+    'backtrack': (lambda: BacktrackParser(PatternLexer(''), builder=NativeBuilder()), 'stat'),
+    'list': (lambda: ListParser(ListLexer(''), NativeBuilder()), 'list'),
+    'dict': (lambda: DictParser(DictLexer(''), NativeBuilder()), 'dict'),
+}
+
+# a record nested deeper than the recursion limit fails on its own, too
+PARSE_ERRORS = (ParseError, RecursiveDescendant.ParseError, RecursionError)
+
+DEFAULT_CHUNK_SIZE = 512
+
+_parsers = {}
+
+
+def cached_parser(grammar):
+    """Return this process's (parser, start rule) for grammar, creating it on first use"""
+    cached = _parsers.get(grammar)
+    if cached is None:
+        factory, start = GRAMMARS[grammar]
+        parser = factory()
+        cached = _parsers[grammar] = (parser, getattr(parser, start))
+
+    return cached
+
+
+def parse_chunk(grammar, records):
+    """Parse records in order; a ParseError or RecursionError is returned in place of its value"""
+    parser, start = cached_parser(grammar)
+    results = []
+    for record in records:
+        try:
+            parser.reset(record)
+            results.append(start())
+        except PARSE_ERRORS as e:
+            results.append(e)
+
+    return results
+
+
+def chunked(iterable, chunk_size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_parse_many(iterable, grammar='stat', workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield the parse result of every record in input order.
+
+    Results are built with NativeBuilder; a record that fails to parse yields
+    its ParseError (or RecursionError when nested too deep) instead of
+    raising. With workers=1 everything runs in this
+    process, otherwise at most ``2 * workers`` chunks are in flight so the
+    input is consumed lazily.
+    """
+    if grammar not in GRAMMARS:
+        raise ValueError('unknown grammar {name!r}'.format(name=grammar))
+
+    workers = workers or os.cpu_count() or 1
+    chunks = chunked(iterable, chunk_size)
+    if workers == 1:
+        for chunk in chunks:
+            yield from parse_chunk(grammar, chunk)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chunk in chunks:
+            pending.append(executor.submit(parse_chunk, grammar, chunk))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+
+        while pending:
+            yield from pending.popleft().result()
+
+
+def parse_many(iterable, grammar='stat', workers=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Parse every record and return the results as a list, see iter_parse_many"""
+    return list(iter_parse_many(iterable, grammar, workers, chunk_size))
+
+
+if __name__ == '__main__':
+    records = ['[a, b=c, [d]]', '[a,b]=[c,d]', '[a,', '[x]'] * 4
+    for record, result in zip(records, parse_many(records, workers=2, chunk_size=3)):
+        print('{record:16} {result!r}'.format(record=record, result=result))
@@ -0,0 +1,284 @@
+__author__ = 'kid143'
+
+
+"""Incremental re-parsing of an edited stat input.
+
+A Document keeps the token stream and the memo of its last parse. An edit
+re-lexes only from the first damaged token until the new tokens line up with
+the old ones again, and splices the result into the token arrays. Memo entries
+are stored as token counts relative to their start, so entries after the edit
+stay valid without being shifted; each token records the edit generation that
+lexed it, and an entry is only reused while no token it covered (plus the k
+lookahead tokens) is newer than the entry. Failed entries do not record how
+far they looked, so they are only reused within the generation that made them.
+
+The parser consults the memo outside speculation as well, so a memoized list
+that lies outside the edit is skipped in one step. Documents are validated, not
+built: a memo hit has no value to return.
+"""
+
+import bisect
+import sys
+from array import array
+
+from base import *
+from Memorize import MemoBacktrackParser
+
+
+NO_ENTRY = 0
+
+
+class TokenStore(object):
+    """
+    Token arrays for a whole document, ending with k EOF tokens.
+
+    Like TokenBuffer, but every token also records ``born``, the edit
+    generation that produced it, and the arrays can be spliced. ``damaged``
+    lists the indexes of the tokens lexed by edits in order, so asking whether
+    a range changed costs a bisect rather than a pass over the range.
+
+    Offsets of tokens from ``gap`` on are stored ``gap_delta`` characters
+    short; shift() just moves the gap, so an edit only rewrites the offsets
+    between it and the previous edit.
+    """
+    def __init__(self, input_lexer, k):
+        self.lexer = input_lexer
+        self.k = k
+        self.types = array('B')
+        self.starts = array('i')
+        self.ends = array('i')
+        self.born = array('I')
+        self.damaged = []
+        self.gap = 0
+        self.gap_delta = 0
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, i):
+        token_type = self.types[i]
+        if token_type == EOF:
+            return Token(EOF, TOKEN_NAMES[EOF], self.start(i))
+
+        return Token(token_type, self.lexer.text(self.start(i), self.end(i)), self.start(i))
+
+    def token_type(self, i):
+        return self.types[i]
+
+    def start(self, i):
+        return self.starts[i] + self.gap_delta if i >= self.gap else self.starts[i]
+
+    def end(self, i):
+        return self.ends[i] + self.gap_delta if i >= self.gap else self.ends[i]
+
+    def fill(self, input_lexer, n):
+        # only reached when peeking past the padding
+        end = self.end(len(self) - 1)
+        for x in range(n):
+            self.append(EOF, end, end, 0)
+
+    def append(self, token_type, start, end, born):
+        self.types.append(token_type)
+        self.starts.append(start - self.gap_delta)
+        self.ends.append(end - self.gap_delta)
+        self.born.append(born)
+
+    def lex(self, generation):
+        """Tokenize the lexer's whole input"""
+        token_type = None
+        while token_type != EOF:
+            token_type, start, end = self.lexer.next_span()
+            self.append(token_type, start, end, generation)
+        for x in range(self.k - 1):
+            self.append(EOF, end, end, generation)
+
+    def first_damaged(self, offset):
+        """Index of the first token ending at or after offset, the first one an edit there can change"""
+        i = bisect.bisect_left(self.ends, offset, 0, self.gap)
+        if i < self.gap:
+            return i
+        return bisect.bisect_left(self.ends, offset - self.gap_delta, self.gap)
+
+    def changed_since(self, i, j, generation):
+        """True if a token in [i, j) was lexed after generation"""
+        damaged = self.damaged
+        for x in damaged[bisect.bisect_left(damaged, i):bisect.bisect_left(damaged, j)]:
+            if self.born[x] > generation:
+                return True
+
+        return False
+
+    def splice(self, i, j, types, starts, ends, generation):
+        """Replace tokens [i, j) by the given ones; the gap must not lie inside [i, j)"""
+        n = len(types)
+        moved = n - (j - i)
+        if self.gap >= j:
+            self.gap += moved
+        self.types[i:j] = types
+        self.starts[i:j] = starts
+        self.ends[i:j] = ends
+        self.born[i:j] = array('I', [generation]) * n
+
+        damaged = self.damaged
+        lo = bisect.bisect_left(damaged, i)
+        hi = bisect.bisect_left(damaged, j)
+        damaged[lo:] = list(range(i, i + n)) + [x + moved for x in damaged[hi:]]
+
+    def shift(self, i, delta):
+        """Move the offsets of tokens i.. by delta characters"""
+        gap, gap_delta = self.gap, self.gap_delta
+        starts, ends = self.starts, self.ends
+        if i < gap:
+            for x in range(i, gap):
+                starts[x] -= gap_delta
+                ends[x] -= gap_delta
+        else:
+            for x in range(gap, i):
+                starts[x] += gap_delta
+                ends[x] += gap_delta
+        self.gap = i
+        self.gap_delta = gap_delta + delta
+
+
+class IncrementalMemo(object):
+    """
+    Memo with one array per rule, parallel to the TokenStore.
+
+    A success at token i is stored as its token count plus one, a failure as
+    MEMO_FAILED, together with the generation that recorded it. The keys and
+    stop indexes seen by the parser are the usual absolute ones.
+    """
+    memoize_cheap = True
+
+    def __init__(self, tokens, rule_count):
+        self.tokens = tokens
+        self.rule_count = rule_count
+        self.lengths = [array('i') for r in range(rule_count)]
+        self.gens = [array('I') for r in range(rule_count)]
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.clear()
+
+    def __len__(self):
+        return sum(len(lengths) - lengths.count(NO_ENTRY) for lengths in self.lengths)
+
+    def get(self, key):
+        i, rule = divmod(key, self.rule_count)
+        length = self.lengths[rule][i]
+        gen = self.gens[rule][i]
+        stop = None
+        if length == MEMO_FAILED:
+            if gen == self.generation:
+                stop = MEMO_FAILED
+        elif length != NO_ENTRY:
+            if not self.tokens.changed_since(i, i + length - 1 + self.tokens.k, gen):
+                stop = i + length - 1
+
+        if stop is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return stop
+
+    def put(self, key, stop):
+        i, rule = divmod(key, self.rule_count)
+        self.lengths[rule][i] = MEMO_FAILED if stop == MEMO_FAILED else stop - i + 1
+        self.gens[rule][i] = self.generation
+
+    def splice(self, i, j, n):
+        """Tokens [i, j) were replaced by n new ones; their entries go"""
+        for lengths, gens in zip(self.lengths, self.gens):
+            lengths[i:j] = array('i', [NO_ENTRY]) * n
+            gens[i:j] = array('I', [0]) * n
+
+    def evict(self, floor_key, speculating):
+        pass
+
+    def clear(self):
+        n = len(self.tokens)
+        for lengths, gens in zip(self.lengths, self.gens):
+            lengths[:] = array('i', [NO_ENTRY]) * n
+            gens[:] = array('I', [0]) * n
+
+
+class IncrementalParser(MemoBacktrackParser):
+    """
+    MemoBacktrackParser over a whole TokenStore that memoizes every rule call
+    and never compacts its window
+    """
+    memoize_always = True
+    compact_threshold = sys.maxsize
+
+
+class Document(object):
+    """
+    A stat input that can be edited and parsed again.
+
+    ``parse()`` raises ParseError like MemoBacktrackParser.stat(); ``edit()``
+    replaces ``removed`` characters at ``offset`` by ``inserted``, leaving the
+    document unchanged if the new text does not lex. ``relexed`` is the number
+    of tokens lexed by the last edit.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.generation = 0
+        self.relexed = 0
+        self.lexer = PatternLexer(text)
+        self.tokens = TokenStore(self.lexer, IncrementalParser.k)
+        self.tokens.lex(self.generation)
+        self.memo = IncrementalMemo(self.tokens, IncrementalParser.memo_rule_count)
+        self.parser = IncrementalParser(self.lexer, self.tokens, self.memo)
+
+    def parse(self):
+        del self.parser.markers[:]
+        self.parser.seek(0)
+        self.parser.stat()
+
+    def edit(self, offset, removed, inserted):
+        if offset < 0 or offset + removed > len(self.text):
+            raise ValueError('edit {offset}+{removed} outside the text'.format(offset=offset, removed=removed))
+
+        tokens = self.tokens
+        old_end = offset + removed
+        delta = len(inserted) - removed
+        text = self.text[:offset] + inserted + self.text[old_end:]
+
+        i = tokens.first_damaged(offset)
+        self.lexer.reset(text)
+        self.lexer.p = min(tokens.start(i), offset)
+        types, starts, ends = array('B'), array('i'), array('i')
+        j = i
+        try:
+            while True:
+                token_type, start, end = self.lexer.next_span()
+                types.append(token_type)
+                starts.append(start)
+                ends.append(end)
+                while tokens.start(j) + delta < start or tokens.start(j) < old_end:
+                    j += 1
+                if (tokens.start(j) + delta == start and tokens.end(j) + delta == end
+                        and tokens.types[j] == token_type):
+                    # the rest of the stream is unchanged; the matching token is
+                    # replaced too so the edit always leaves a new token behind
+                    j += 1
+                    break
+        except ParseError:
+            self.lexer.reset(self.text)
+            raise
+
+        self.text = text
+        self.generation += 1
+        self.memo.generation = self.generation
+        tokens.shift(j, delta)
+        tokens.splice(i, j, types, starts, ends, self.generation)
+        self.memo.splice(i, j, len(types))
+        self.relexed = len(types)
+
+
+if __name__ == '__main__':
+    document = Document('[a, [b, c], d] = [e, f]')
+    document.parse()
+    document.edit(5, 1, 'x=y')
+    document.parse()
+    print(document.text, document.relexed, document.memo.hits, document.memo.misses)
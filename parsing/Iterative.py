@@ -0,0 +1,90 @@
+__author__ = 'kid143'
+
+
+"""Explicit stack versions of the list, dict and stat grammars.
+
+The grammars of RecursiveDescendant and Backtrack written in the Grammar DSL
+and compiled into LL(k) prediction tables for TableParser. Nesting depth is
+limited by memory only.
+"""
+
+from base import *
+from Backtrack import ListLexer
+from RecursiveDescendant import ListLexer as SimpleListLexer, DictLexer
+
+
+LIST_GRAMMAR = """
+list          : LBRACKET elements RBRACKET ;
+elements      : element elements_tail ;
+elements_tail : COMMA element elements_tail | ;
+element       : NAME | list ;
+"""
+
+DICT_GRAMMAR = """
+dict          : LBRACKET pairs RBRACKET ;
+pairs         : pair pairs_tail ;
+pairs_tail    : COMMA pair pairs_tail | ;
+pair          : NAME COLON value ;
+value         : NAME | dict ;
+"""
+
+STAT_GRAMMAR = """
+stat          : list stat_tail ;
+stat_tail     : EQUALS list | ;
+list          : LSQRTBRACKET elements RSQRTBRACKET ;
+elements      : element elements_tail ;
+elements_tail : COMMA element elements_tail | ;
+element       : NAME EQUALS NAME | NAME | list ;   # LL(2)
+"""
+
+
+class IterativeListParser(TableParser):
+    """
+    RecursiveDescendant.ListParser grammar
+    """
+    grammar = Grammar(LIST_GRAMMAR, SimpleListLexer.token_names, eof=1)
+    token_names = SimpleListLexer.token_names
+
+    def list(self):
+        self.parse()
+
+
+class IterativeDictParser(TableParser):
+    """
+    RecursiveDescendant.DictParser grammar
+    """
+    grammar = Grammar(DICT_GRAMMAR, DictLexer.token_names, eof=1)
+    token_names = DictLexer.token_names
+
+    def dict(self):
+        self.parse()
+
+
+class IterativeStatParser(TableParser):
+    """
+    Backtrack.BacktrackParser grammar; stat needs no speculation once
+    'list EOF | list = list EOF' is left factored
+    """
+    grammar = Grammar(STAT_GRAMMAR, TOKEN_NAMES, k=2)
+    token_names = TOKEN_NAMES
+
+    def stat(self):
+        self.parse()
+
+    def list(self):
+        self.parse('list')
+
+
+if __name__ == '__main__':
+    depth = 100000
+    lexer = SimpleListLexer('[' * depth + 'a' + ']' * depth)
+    parser = IterativeListParser(lexer)
+    parser.list()
+
+    lexer2 = DictLexer('{a: b, c: d, e: {f: g}}')
+    parser2 = IterativeDictParser(lexer2)
+    parser2.dict()
+
+    lexer3 = ListLexer('[a,b=c,[d]]=[e]')
+    parser3 = IterativeStatParser(lexer3)
+    parser3.stat()
@@ -8,106 +8,29 @@ class ListLexer(Lexer):
     """
     ListLexer
     """
-    def __init__(self, input_string):
-        Lexer.__init__(self, input_string)
+    literals = {
+        ',': COMMA,
+        '[': LSQRTBRACKET,
+        ']': RSQRTBRACKET,
+        '=': EQUALS
+    }
 
-    def ws(self):
-        while self.c in EMPTY:
-            self.advance()
 
-    def is_letter(self):
-        return 'a' <= self.c <= 'z' or 'A' <= self.c <= 'Z'
-
-    def letter(self):
-        if self.is_letter():
-            self.consume()
-
-    def next_token(self):
-        def comma():
-            self.consume()
-            return Token(COMMA, ',')
-
-        def lbracket():
-            self.consume()
-            return Token(LSQRTBRACKET, '[')
-
-        def rbracket():
-            self.consume()
-            return Token(RSQRTBRACKET, ']')
-
-        def equals():
-            self.consume()
-            return Token(EQUALS, '=')
-
-        case_dict = {
-            ' ': self.ws,
-            '\t': self.ws,
-            '\r': self.ws,
-            '\n': self.ws,
-            ',': comma,
-            '[': lbracket,
-            ']': rbracket,
-            '=': equals
-        }
-
-        def name_token():
-            s = self.c
-            while self.is_letter():
-                self.consume()
-                s = ''.join([s, self.c])
-
-            return Token(NAME, s)
-
-        while self.c is not None:
-            try:
-                token_func = case_dict[self.c]
-            except KeyError:
-                token_func = name_token
-
-            if token_func == self.ws:
-                self.ws()
-                continue
-            else:
-                return token_func()
-
-        return Token(EOF, TOKEN_NAMES[EOF])
-
-
-class Parser(object):
+class Parser(SpeculationWindow, PackratParser, TracedParser, BuildingParser):
     """
     Memorized backtrack parser
     """
-    def __init__(self, input_lexer):
-        self.lexer = input_lexer
-        self.markers = []
-        self.lookahead = []
-        self.p = 0
-        self.sync(1)
-
-    def consume(self):
-        self.p += 1
-        if self.p == len(self.lookahead) and not self.isSpeculating:
-            self.p = 0
-            self.lookahead.clear()
-            self.clearMemo()
-
-        self.sync(1)
-
-    def sync(self, i):
-        if self.p + i - 1 > (len(self.lookahead) - 1):
-            n = (self.p + i - 1) - (len(self.lookahead) - 1)
-            self.fill(n)
-
-    def fill(self, n):
-        ex = [self.lexer.next_token() for x in range(n)]
-        self.lookahead.extend(ex)
-
-    def lt(self, i):
-        self.sync(i)
-        return self.lookahead[self.p + i - 1]
-
-    def la(self, i):
-        return self.lt(i).token_type
+    def __init__(self, input_lexer, lookahead=None, memo=None):
+        SpeculationWindow.__init__(self, input_lexer, lookahead)
+        self.memo = memo if memo is not None else MemoTable()
+
+    def restart(self):
+        SpeculationWindow.restart(self)
+        self.clearMemo()
+
+    def compact(self, n):
+        SpeculationWindow.compact(self, n)
+        self.memo.evict(self.offset * self.memo_rule_count, self.isSpeculating)
 
     def match(self, x):
         if self.la(1) == x:
@@ -115,30 +38,19 @@ class Parser(object):
         else:
             raise ParseError('expecting {ex} found {fnd}'.format(ex=TOKEN_NAMES[x], fnd=self.lt(1)))
 
-    def mark(self):
-        self.markers.append(self.p)
-        return self.p
-
-    def release(self):
-        marker = self.markers[len(self.markers) - 1]
-        self.markers.pop()
-        self.seek(marker)
-
-    def seek(self, index):
-        self.p = index
-
     @property
     def isSpeculating(self):
         return len(self.markers) > 0
 
-    def alreadyParsedRule(self, memoization):
-        memoI = memoization.get(self.p)
-        if not memoI:
+    def alreadyParsedRule(self, key):
+        memoI = self.memo.get(key)
+        if memoI is None:
+            if self.tracer is not None:
+                self.tracer.event(MEMO_MISS, self.memo_rule_names[key % self.memo_rule_count], self.index())
             return False
 
-        print('parsed list before at index: {idx}; skip ahead to token index: {idxx}'.format(
-            idx=self.p,
-            idxx=self.lookahead[memoI].string))
+        if self.tracer is not None:
+            self.tracer.event(MEMO_HIT, self.memo_rule_names[key % self.memo_rule_count], self.index())
 
         if memoI == MEMO_FAILED:
             raise ParseError('Previous Parse Failed')
@@ -146,114 +58,132 @@ class Parser(object):
         self.seek(memoI)
         return True
 
-    def memoize(self, memoization, startTokenIndex, failed):
-        stopTokenIndex =  MEMO_FAILED if failed else self.p
-        memoization[startTokenIndex] = stopTokenIndex
+    def memoize(self, key, failed):
+        stopTokenIndex =  MEMO_FAILED if failed else self.index()
+        self.memo.put(key, stopTokenIndex)
 
     def clearMemo(self):
-        raise NotImplementedError
+        self.memo.clear()
 
 
 class MemoBacktrackParser(Parser):
     """
     List parser
     """
-    def __init__(self, input_lexer):
-        Parser.__init__(self, input_lexer)
-        self.list_memo = {}
+    k = 2
+    rules = ('stat', 'list', 'assign', 'elements', 'element')
 
-    def clearMemo(self):
-        self.list_memo.clear()
+    def __init__(self, input_lexer, lookahead=None, memo=None, builder=None):
+        Parser.__init__(self, input_lexer, lookahead, memo)
+        self.builder = builder
 
     def stat(self):
         if self.speculate_stat_alt1:
-            print('predict alternative 1')
-            self.list()
+            value = self.list()
             self.match(EOF)
         elif self.speculate_stat_alt2:
-            print('predict alternative 2')
-            self.assign()
+            value = self.assign()
             self.match(EOF)
         else:
             raise ParseError('expecting stat found {fnd}'.format(fnd=self.lt(1)))
 
+        return value
+
     @property
     def speculate_stat_alt1(self):
-        print('attempt alternative 1')
         success = True
         self.mark()
+        if self.tracer is not None:
+            self.tracer.event(SPECULATE_START, 'stat_alt1', self.index())
         try:
             self.list()
             self.match(EOF)
         except ParseError:
             success = False
 
+        if self.tracer is not None:
+            self.tracer.event(SPECULATE_SUCCESS if success else SPECULATE_FAIL, 'stat_alt1', self.index())
         self.release()
         return success
 
     @property
     def speculate_stat_alt2(self):
-        print('attempt alternative 2')
         success = True
         self.mark()
+        if self.tracer is not None:
+            self.tracer.event(SPECULATE_START, 'stat_alt2', self.index())
         try:
             self.assign()
             self.match(EOF)
         except ParseError:
             success = False
 
+        if self.tracer is not None:
+            self.tracer.event(SPECULATE_SUCCESS if success else SPECULATE_FAIL, 'stat_alt2', self.index())
         self.release()
         return success
 
-    def _list(self):
+    @memoized_rule
+    def list(self):
         self.match(LSQRTBRACKET)
-        self.elements()
+        items = self.elements()
         self.match(RSQRTBRACKET)
+        if self.building:
+            return self.builder.list(items)
 
+    @memoized_rule
     def assign(self):
-        self.list()
+        target = self.list()
         self.match(EQUALS)
-        self.list()
-
-    def list(self):
-        failed = False
-        startTokenIndex = self.p
-        if self.isSpeculating and self.alreadyParsedRule(self.list_memo):
-            return
-
-        try:
-            self._list()
-        except ParseError:
-            failed = True
-            raise
-        finally:
-            if self.isSpeculating:
-                self.memoize(self.list_memo, startTokenIndex, failed)
+        value = self.list()
+        if self.building:
+            return self.builder.assignment(target, value)
 
+    @memoized_rule
     def elements(self):
-        self.element()
+        # values are only kept when building, so validating a long list keeps
+        # no per element state
+        items = [self.element()]
+        building = self.building
         while self.la(1) == COMMA:
             self.match(COMMA)
-            self.element()
+            item = self.element()
+            if building:
+                items.append(item)
+
+        return items
 
+    @memoized_rule(cheap=True)
     def element(self):
         if self.la(1) == NAME and self.la(2) == EQUALS:
-            self.match(NAME)
+            target = self.name()
             self.match(EQUALS)
-            self.match(NAME)
+            value = self.name()
+            if self.building:
+                return self.builder.assignment(target, value)
         elif self.la(1) == NAME:
-            self.match(NAME)
+            return self.name()
         elif self.la(1) == LSQRTBRACKET:
-            self.list()
+            return self.list()
         else:
             raise ParseError('expecting element found {fnd}'.format(fnd=self.lt(1)))
 
+    def name(self):
+        token = self.lt(1)
+        self.match(NAME)
+        if self.building:
+            return self.builder.name(token)
+
 
 if __name__ == '__main__':
+    sink = StderrSink(kinds=(SPECULATE_START, SPECULATE_SUCCESS, SPECULATE_FAIL, MEMO_HIT))
+
     lexer1 = ListLexer('[a,b,c=d,e,f]')
     parser1 = MemoBacktrackParser(lexer1)
+    parser1.set_tracer(sink)
     parser1.stat()
 
     lexer2 = ListLexer('[a,b,c] = [d,e,f]')
     parser2 = MemoBacktrackParser(lexer2)
+    parser2.set_tracer(sink)
     parser2.stat()
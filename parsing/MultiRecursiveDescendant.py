@@ -1,4 +1,6 @@
 from parsing.RecursiveDescendant import ListLexer
+from parsing import base
+from parsing.base import ErrorRecord, LookaheadWindow, PatternLexer, RecoveringLexer
 
 __author__ = 'huang'
 
@@ -17,23 +19,40 @@ class Token:
     """
     Token object
     """
-    def __init__(self, token_type, string):
+    __slots__ = ('token_type', 'string', 'start')
+
+    def __init__(self, token_type, string, start=-1):
         self.token_type = token_type
         self.string = string
+        self.start = start
 
     def __str__(self):
-        return "<Token type: {type}, string: '{string}'>".format(type=ListLexer.token_names[self.token_type],
-                                                                 string=self.string)
+        return "<Token type: {type}, string: '{string}'>".format(type=ListMultiLexer.token_names[self.token_type],
+                                                                      string=self.string)
 
 
 class Lexer:
     """
     Lexer base class
+
+    Subclasses declare their single character tokens in ``literals``; the
+    dispatch table is built once per class. Whitespace maps to None.
     """
+    literals = {}
+    dispatch = dict.fromkeys((' ', '\t', '\r', '\n'))
+
     def __init__(self, input_string):
+        self.reset(input_string)
+
+    def reset(self, input_string):
         self.input_string = input_string
         self.p = 0
-        self.c = self.input_string[self.p]
+        self.c = input_string[0] if input_string else None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = dict.fromkeys((' ', '\t', '\r', '\n'))
+        cls.dispatch.update(cls.literals)
 
     def consume(self):
         self.advance()
@@ -56,6 +75,23 @@ class Lexer:
             raise ParseError('Expect {expect}; found:{found}'.format(expect=x, found=self.c))
 
     def next_token(self):
+        dispatch = self.dispatch
+        while self.c is not None:
+            if self.c not in dispatch:
+                return self.name_token()
+
+            token_type = dispatch[self.c]
+            if token_type is None:
+                self.ws()
+            else:
+                c = self.c
+                start = self.p
+                self.consume()
+                return Token(token_type, c, start)
+
+        return Token(1, ListLexer.token_names[1], self.p)
+
+    def name_token(self):
         raise NotImplementedError
 
     def ws(self):
@@ -72,6 +108,12 @@ class ListMultiLexer(Lexer):
     NAME = 5
     EQUALS = 6
     token_names = ['n/a', '<EOF>', 'COMMA', 'LBRACKET', 'RBRACKET', 'NAME', 'EQUALS']
+    literals = {
+        ',': COMMA,
+        '[': LBRACKET,
+        ']': RBRACKET,
+        '=': EQUALS
+    }
 
     def __init__(self, input_string):
         Lexer.__init__(self, input_string)
@@ -87,95 +129,94 @@ class ListMultiLexer(Lexer):
         while self.c in (' ', '\t', '\r', '\n'):
             self.advance()
 
-    def next_token(self):
-        def comma():
-            self.consume()
-            return Token(self.COMMA, ',')
-
-        def lbracket():
-            self.consume()
-            return Token(self.LBRACKET, '[')
-
-        def rbracket():
-            self.consume()
-            return Token(self.RBRACKET, ']')
-
-        def equals():
-            self.consume()
-            return Token(self.EQUALS, '=')
-
-        case_dict = {
-            ' ': self.ws,
-            '\t': self.ws,
-            '\r': self.ws,
-            '\n': self.ws,
-            ',': comma,
-            '[': lbracket,
-            ']': rbracket,
-            '=': equals
-        }
-
-        def name_token():
-            s = self.c
-            while self.is_letter():
-                self.consume()
-                s = ''.join([s, self.c])
-
-            return Token(self.NAME, s)
-
-        while self.c is not None:
-            try:
-                token_func = case_dict[self.c]
-            except KeyError:
-                token_func = name_token
-
-            if token_func == self.ws:
-                self.ws()
-                continue
-            else:
-                return token_func()
+    def name_token(self):
+        start = self.p
+        while self.c is not None and self.is_letter():
+            self.advance()
+        if self.p == start:
+            raise ParseError('invalid character {c!r} at {pos}'.format(c=self.c, pos=self.p))
 
-        return Token(1, ListLexer.token_names[1])
+        s = self.input_string[start:self.p]
+        self.ws()
+        return Token(self.NAME, s, start)
 
 
-class Parser:
+class ListMultiPatternLexer(PatternLexer):
+    """
+    PatternLexer emitting ListMultiLexer's token types
+    """
+    COMMA = ListMultiLexer.COMMA
+    LBRACKET = ListMultiLexer.LBRACKET
+    RBRACKET = ListMultiLexer.RBRACKET
+    NAME = ListMultiLexer.NAME
+    EQUALS = ListMultiLexer.EQUALS
+    literals = ListMultiLexer.literals
+    name_type = ListMultiLexer.NAME
+    eof_type = 1
+    token_names = ListMultiLexer.token_names
+    token_class = Token
+    parse_error = ParseError
+
+
+class Parser(LookaheadWindow):
     """
     Parser class
+
+    With recover=True errors are recorded in ``errors`` as ErrorRecords, invalid
+    characters are skipped by the lexer and parsing resumes at the next COMMA or
+    closing bracket of the current list.
     """
-    def __init__(self, input_lexer, k):
-        self.lexer = input_lexer
-        self.lookahead = []
-        self.k = k
-        self.p = 0
-        for i in range(k):
-            self.consume()
+    def __init__(self, input_lexer, k, recover=False):
+        self.recover = recover
+        self.errors = []
+        if recover:
+            input_lexer = RecoveringLexer(input_lexer, self.errors, (ParseError, base.ParseError))
+        LookaheadWindow.__init__(self, input_lexer, k)
+
+    def reset(self, input_string):
+        del self.errors[:]
+        LookaheadWindow.reset(self, input_string)
 
     def match(self, x):
         if self.la(1) == x:
             self.consume()
         else:
-            raise ParseError('Expect {expect}; found: {found}'.format(expect=x, found=self.la(1)))
-
-    def lt(self, i):
-        return self.lookahead[(self.p + i - 1) % self.k]
-
-    def la(self, i):
-        return self.lt(i).token_type
-
-    def consume(self):
-        if len(self.lookahead) > self.p:
-            self.lookahead[self.p] = self.lexer.next_token()
-        else:
-            self.lookahead.append(self.lexer.next_token())
-        self.p = (self.p + 1) % self.k
+            self.error('Expect {expect}; found: {found}'.format(expect=x, found=self.la(1)))
+
+    def error(self, message):
+        if not self.recover:
+            raise ParseError(message)
+
+        token = self.lt(1)
+        if self.errors and self.errors[-1].offset == token.start:
+            return
+        if self.lexer.resumed_at == token.start:
+            return
+
+        self.errors.append(ErrorRecord(token.start, message, token.string))
+
+    def resync(self):
+        """Skip to the next COMMA or RBRACKET outside the brackets opened while skipping"""
+        depth = 0
+        while True:
+            token_type = self.la(1)
+            if token_type == 1 or (depth == 0 and token_type in (ListMultiLexer.COMMA, ListMultiLexer.RBRACKET)):
+                return
+            if token_type == ListMultiLexer.LBRACKET:
+                depth += 1
+            elif token_type == ListMultiLexer.RBRACKET:
+                depth -= 1
+            self.consume()
 
 
 class ListMultiParser(Parser):
     """
     ListMultiParser
     """
-    def __init__(self, input_lexer, k):
-        Parser.__init__(self, input_lexer, k)
+    rules = ('list', 'elements', 'element')
+
+    def __init__(self, input_lexer, k, recover=False):
+        Parser.__init__(self, input_lexer, k, recover)
 
     def list(self):
         self.match(ListMultiLexer.LBRACKET)
@@ -184,9 +225,15 @@ class ListMultiParser(Parser):
 
     def elements(self):
         self.element()
-        while self.la(1) == ListMultiLexer.COMMA:
-            self.consume()
-            self.element()
+        while True:
+            if self.la(1) == ListMultiLexer.COMMA:
+                self.consume()
+                self.element()
+            elif self.recover and self.la(1) not in (ListMultiLexer.RBRACKET, 1):
+                self.error('Expect COMMA or RBRACKET; found {found}'.format(found=str(self.lt(1))))
+                self.resync()
+            else:
+                break
 
     def element(self):
         if self.la(1) == ListMultiLexer.NAME and self.la(2) == ListMultiLexer.EQUALS:
@@ -198,7 +245,8 @@ class ListMultiParser(Parser):
         elif self.la(1) == ListMultiLexer.LBRACKET:
             self.list()
         else:
-            raise ParseError('Expect NAME or list; found {fnd}'.format(fnd=str(self.la(1))))
+            self.error('Expect NAME or list; found {fnd}'.format(fnd=str(self.lt(1))))
+            self.resync()
 
 
 if __name__ == '__main__':
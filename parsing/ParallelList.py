@@ -0,0 +1,158 @@
+__author__ = 'kid143'
+
+
+"""Parse one huge top level list with its elements spread over processes.
+
+A pre-scan walks only the bracket and comma bytes to find the commas at depth
+one, which split the list into independent elements. Workers share the input
+(inherited through fork, no copy) and parse each element in place with the
+stat grammar's ``element`` rule, so every offset in an error is global. The
+result equals ``parse_list()`` on the same input.
+"""
+
+import bisect
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from base import *
+from base.bytelexer import INVALID
+from Backtrack import BacktrackParser
+
+
+STRUCTURE = re.compile(rb'[][,]')
+LEADING_WS = re.compile(rb'[ \t\r\n]*')
+TRAILING_WS = re.compile(rb'[ \t\r\n]*\Z')
+
+OPEN, CLOSE = ord('['), ord(']')
+
+DEFAULT_CHUNK_BYTES = 1 << 20
+
+_parser = None
+
+
+def parse_list(data):
+    """Sequential reference: parse data as one list followed by EOF"""
+    parser = BacktrackParser(ByteLexer(data), builder=NativeBuilder())
+    value = parser.list()
+    parser.match(EOF)
+    return value
+
+
+def split_elements(data):
+    """Return the start offset of every top level element and the offset of the closing ']'"""
+    start = LEADING_WS.match(data).end()
+    if start == len(data) or data[start] != OPEN:
+        raise ParseError('expecting LSQRTBRACKET at {pos}'.format(pos=start))
+
+    starts = [start + 1]
+    depth = 0
+    for m in STRUCTURE.finditer(data, start):
+        c = data[m.start()]
+        if c == OPEN:
+            depth += 1
+        elif c == CLOSE:
+            depth -= 1
+            if depth == 0:
+                end = m.start()
+                if not TRAILING_WS.match(data, end + 1):
+                    pos = LEADING_WS.match(data, end + 1).end()
+                    raise ParseError('expecting EOF after the list at {pos}'.format(pos=pos))
+                return starts, end
+        elif depth == 1:
+            starts.append(m.end())
+
+    raise ParseError('unclosed list at {pos}'.format(pos=len(data)))
+
+
+def chunk_elements(starts, end, chunk_bytes):
+    """Group consecutive element starts into tasks of about chunk_bytes input each"""
+    chunk = []
+    chunk_start = starts[0]
+    for start in starts:
+        if chunk and start - chunk_start >= chunk_bytes:
+            yield chunk
+            chunk = []
+            chunk_start = start
+        chunk.append(start)
+
+    yield chunk
+
+
+def element_parser(data):
+    """Parser over data for parse_elements; it reads nothing until one seeks it"""
+    lexer = ByteLexer(data)
+    lexer.p = len(data)
+    return BacktrackParser(lexer, builder=NativeBuilder())
+
+
+def init_worker(data):
+    global _parser
+    _parser = element_parser(data)
+
+
+def error_offset(parser):
+    """Offset a ParseError was raised for: the invalid byte the lexer stopped
+       at, or else the current token
+    """
+    lexer = parser.lexer
+    if lexer.p < lexer.n and lexer.table[lexer.input_string[lexer.p]] == INVALID:
+        return lexer.p
+    return parser.lt(1).start
+
+
+def parse_elements(starts, stop, last, parser=None):
+    """Parse the elements beginning at starts with parser, this worker's by
+       default. stop is where the element after the chunk begins (or the
+       closing ']'); the chunk holding the final element passes last=True.
+    """
+    if parser is None:
+        parser = _parser
+    lexer = parser.lexer
+    values = []
+    final = len(starts) - 1
+    for i, start in enumerate(starts):
+        lexer.p = start
+        try:
+            parser.restart()
+            values.append(parser.element())
+            parser.match(RSQRTBRACKET if last and i == final else COMMA)
+        except ParseError as e:
+            # the lexer runs a token ahead, so the failing offset can lie in
+            # the next element
+            bounds = starts + [stop]
+            owner = bounds[bisect.bisect_right(bounds, error_offset(parser)) - 1]
+            raise ParseError('in element at {start}: {msg}'.format(start=owner, msg=e))
+
+    return values
+
+
+def parallel_parse_list(data, workers=None, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """Parse data, a bytes-like object holding one list, with up to workers processes"""
+    if isinstance(data, str):
+        data = data.encode('ascii')
+
+    starts, end = split_elements(data)
+    chunks = list(chunk_elements(starts, end, chunk_bytes))
+    stops = [chunk[0] for chunk in chunks[1:]] + [end]
+    last = [False] * (len(chunks) - 1) + [True]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    if workers == 1:
+        # a local parser, so the input is not kept alive by a module global
+        parser = element_parser(data)
+        return [value for chunk, stop, is_last in zip(chunks, stops, last) for value in parse_elements(chunk, stop, is_last, parser)]
+
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    else:
+        context = None
+    with ProcessPoolExecutor(workers, context, init_worker, (data,)) as executor:
+        results = executor.map(parse_elements, chunks, stops, last)
+        return [value for values in results for value in values]
+
+
+if __name__ == '__main__':
+    text = b'[a, b=c, [d, [e, f]], g, [h=i, j]]'
+    print(parallel_parse_list(text, workers=2, chunk_bytes=8))
+    print(parse_list(text))
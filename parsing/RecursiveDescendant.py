@@ -8,6 +8,13 @@ __author__ = 'huang'
    :version 0.1
 """
 
+try:
+    import base
+    from base import ErrorRecord, START_LIST, END_LIST, START_DICT, END_DICT, NAME_EVENT, PAIR_KEY
+except ImportError:
+    from parsing import base
+    from parsing.base import ErrorRecord, START_LIST, END_LIST, START_DICT, END_DICT, NAME_EVENT, PAIR_KEY
+
 
 class ParseError(Exception):
     pass
@@ -17,23 +24,41 @@ class Token:
     """
     Token object
     """
-    def __init__(self, token_type, string):
+    __slots__ = ('token_type', 'string', 'start')
+
+    def __init__(self, token_type, string, start=-1):
         self.token_type = token_type
         self.string = string
+        self.start = start
 
     def __str__(self):
-        return "<Token type: {type}, string: '{string}'>".format(type=ListLexer.token_names[self.token_type],
+        return "<Token type: {type}, string: '{string}'>".format(type=DictLexer.token_names[self.token_type],
                                                                  string=self.string)
 
 
 class Lexer:
     """
     Lexer base class
+
+    Subclasses declare their single character tokens in ``literals``; the
+    dispatch table is built once per class. Whitespace maps to None and a
+    NAME runs until the next character found in the table.
     """
+    literals = {}
+    dispatch = dict.fromkeys((' ', '\t', '\r', '\n'))
+
     def __init__(self, input_string):
+        self.reset(input_string)
+
+    def reset(self, input_string):
         self.input_string = input_string
         self.p = 0
-        self.c = self.input_string[self.p]
+        self.c = input_string[0] if input_string else None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = dict.fromkeys((' ', '\t', '\r', '\n'))
+        cls.dispatch.update(cls.literals)
 
     def consume(self):
         self.p += 1
@@ -52,7 +77,32 @@ class Lexer:
             raise ParseError('Expect {expect}; found:{found}'.format(expect=x, found=self.c))
 
     def next_token(self):
-        raise NotImplementedError
+        dispatch = self.dispatch
+        while self.c is not None:
+            if self.c not in dispatch:
+                return self.name_token()
+
+            token_type = dispatch[self.c]
+            if token_type is None:
+                self.ws()
+            else:
+                c = self.c
+                start = self.p
+                self.consume()
+                return Token(token_type, c, start)
+
+        return Token(1, ListLexer.token_names[1], self.p)
+
+    def name_token(self):
+        start = self.p
+        while self.c is not None and self.c not in self.dispatch:
+            self.consume()
+
+        return Token(self.NAME, self.input_string[start:self.p], start)
+
+    def ws(self):
+        while self.c == ' ' or self.c == '\t' or self.c == '\r' or self.c == '\n':
+            self.consume()
 
 
 class ListLexer(Lexer):
@@ -64,103 +114,163 @@ class ListLexer(Lexer):
     RBRACKET = 4
     NAME = 5
     token_names = ['n/a', '<EOF>', 'COMMA', 'LBRACKET', 'RBRACKET', 'NAME']
+    literals = {
+        ',': COMMA,
+        '[': LBRACKET,
+        ']': RBRACKET
+    }
 
     def __init__(self, input_string):
         Lexer.__init__(self, input_string)
 
-    def next_token(self):
-        def ws():
-            while self.c == ' ' or self.c == '\t' or self.c == '\r' or self.c == '\n':
-                self.consume()
-
-        def comma():
-            self.consume()
-            return Token(self.COMMA, ',')
-
-        def lbracket():
-            self.consume()
-            return Token(self.LBRACKET, '[')
-
-        def rbracket():
-            self.consume()
-            return Token(self.RBRACKET, ']')
-
-        case_dict = {
-            ' ': ws,
-            '\t': ws,
-            '\r': ws,
-            '\n': ws,
-            ',': comma,
-            '[': lbracket,
-            ']': rbracket
-        }
-
-        def name_token():
-            s = self.c
-            while self.c not in case_dict:
-                self.consume()
-                ''.join([s, self.c])
-
-            return Token(self.NAME, s)
-        while self.c is not None:
-            try:
-                token_func = case_dict[self.c]
-            except KeyError:
-                token_func = name_token
-
-            if token_func == ws:
-                token_func()
-                continue
-            else:
-                return token_func()
 
-        return Token(1, ListLexer.token_names[1])
+class ListPatternLexer(base.PatternLexer):
+    """
+    PatternLexer emitting ListLexer's token types
+    """
+    COMMA = ListLexer.COMMA
+    LBRACKET = ListLexer.LBRACKET
+    RBRACKET = ListLexer.RBRACKET
+    NAME = ListLexer.NAME
+    literals = ListLexer.literals
+    # like Lexer.name_token: a NAME runs until a literal or whitespace
+    name_pattern = r'[^,\[\] \t\r\n]+'
+    name_type = ListLexer.NAME
+    eof_type = 1
+    token_names = ListLexer.token_names
+    token_class = Token
+    parse_error = ParseError
 
 
 class Parser:
     """
     Parser class
+
+    With recover=True errors are recorded in ``errors`` as ErrorRecords, invalid
+    characters are skipped by the lexer and parsing resumes at the next COMMA
+    or closing bracket of the current list.
     """
-    def __init__(self, input_lexer):
+    def __init__(self, input_lexer, builder=None, recover=False):
+        self.builder = builder
+        self.recover = recover
+        self.errors = []
+        if recover:
+            input_lexer = base.RecoveringLexer(input_lexer, self.errors, (ParseError, base.ParseError))
         self.lexer = input_lexer
         self.lookahead = None
         self.consume()
 
+    def reset(self, input_string):
+        del self.errors[:]
+        self.lexer.reset(input_string)
+        self.consume()
+
     def match(self, x):
         if self.lookahead.token_type == x:
             self.consume()
         else:
-            raise ParseError('Expect {expect}; found: {found}'.format(expect=x, found=self.lookahead.token_type))
+            self.error('Expect {expect}; found: {found}'.format(expect=x, found=self.lookahead.token_type))
 
     def consume(self):
         self.lookahead = self.lexer.next_token()
 
+    def error(self, message):
+        if not self.recover:
+            raise ParseError(message)
+
+        token = self.lookahead
+        if self.errors and self.errors[-1].offset == token.start:
+            return
+        if self.lexer.resumed_at == token.start:
+            return
+
+        self.errors.append(ErrorRecord(token.start, message, token.string))
+
+    def resync(self):
+        """Skip to the next COMMA or RBRACKET outside the brackets opened while skipping"""
+        depth = 0
+        while True:
+            token_type = self.lookahead.token_type
+            if token_type == 1 or (depth == 0 and token_type in (self.lexer.COMMA, self.lexer.RBRACKET)):
+                return
+            if token_type == self.lexer.LBRACKET:
+                depth += 1
+            elif token_type == self.lexer.RBRACKET:
+                depth -= 1
+            self.consume()
+
 
 class ListParser(Parser):
     """
     ListParser
     """
-    def __init__(self, input_lexer):
-        Parser.__init__(self, input_lexer)
+    rules = ('list', 'elements', 'element')
+
+    def __init__(self, input_lexer, builder=None, recover=False):
+        Parser.__init__(self, input_lexer, builder, recover)
 
     def list(self):
         self.match(ListLexer.LBRACKET)
-        self.elements()
+        items = self.elements()
         self.match(ListLexer.RBRACKET)
+        if self.builder is not None:
+            return self.builder.list(items)
 
     def elements(self):
-        self.element()
-        while self.lookahead.token_type == ListLexer.COMMA:
-            self.consume()
-            self.element()
+        items = [self.element()]
+        while True:
+            if self.lookahead.token_type == ListLexer.COMMA:
+                self.consume()
+                item = self.element()
+                if self.builder is not None:
+                    items.append(item)
+            elif self.recover and self.lookahead.token_type not in (ListLexer.RBRACKET, 1):
+                self.error('Expect COMMA or RBRACKET; found {found}'.format(found=str(self.lookahead)))
+                self.resync()
+            else:
+                break
+
+        return items
 
     def element(self):
         if self.lookahead.token_type == ListLexer.LBRACKET:
-            self.list()
+            return self.list()
         elif self.lookahead.token_type == ListLexer.NAME:
+            token = self.lookahead
             self.match(ListLexer.NAME)
+            if self.builder is not None:
+                return self.builder.name(token)
         else:
-            raise ParseError('Expect NAME or list; found {found}'.format(found=str(self.lookahead)))
+            self.error('Expect NAME or list; found {found}'.format(found=str(self.lookahead)))
+            self.resync()
+
+    def iter_list(self):
+        """Yield (event, text) pairs while the lexer is pulled token by token;
+           only the nesting depth is kept, so memory does not grow with the input
+        """
+        self.match(ListLexer.LBRACKET)
+        yield START_LIST, '['
+        depth = 1
+        expect_element = True
+        while depth:
+            if expect_element:
+                if self.lookahead.token_type == ListLexer.LBRACKET:
+                    self.consume()
+                    depth += 1
+                    yield START_LIST, '['
+                    continue
+
+                token = self.lookahead
+                self.match(ListLexer.NAME)
+                yield NAME_EVENT, token.string
+                expect_element = False
+            elif self.lookahead.token_type == ListLexer.COMMA:
+                self.consume()
+                expect_element = True
+            else:
+                self.match(ListLexer.RBRACKET)
+                depth -= 1
+                yield END_LIST, ']'
 
 
 class DictLexer(Lexer):
@@ -173,101 +283,126 @@ class DictLexer(Lexer):
     NAME = 5
     COLON = 6
     token_names = ['n/a', '<EOF>', 'COMMA', 'LBRACKET', 'RBRACKET', 'NAME', 'COLON']
+    literals = {
+        ',': COMMA,
+        '{': LBRACKET,
+        '}': RBRACKET,
+        ':': COLON
+    }
 
     def __init__(self, input_string):
         Lexer.__init__(self, input_string)
 
-    def next_token(self):
-        def ws():
-            while self.c == ' ' or self.c == '\t' or self.c == '\r' or self.c == '\n':
-                self.consume()
-
-        def comma():
-            self.consume()
-            return Token(self.COMMA, ',')
-
-        def lbracket():
-            self.consume()
-            return Token(self.LBRACKET, '{')
-
-        def rbracket():
-            self.consume()
-            return Token(self.RBRACKET, '}')
-
-        def colon():
-            self.consume()
-            return Token(self.COLON, ':')
-
-        case_dict = {
-            ' ': ws,
-            '\t': ws,
-            '\r': ws,
-            '\n': ws,
-            ',': comma,
-            '{': lbracket,
-            '}': rbracket,
-            ':': colon
-        }
-
-        def name_token():
-            s = self.c
-            while self.c not in case_dict:
-                self.consume()
-                ''.join([s, self.c])
-
-            return Token(self.NAME, s)
 
-        while self.c is not None:
-            try:
-                token_func = case_dict[self.c]
-            except KeyError:
-                token_func = name_token
-
-            if token_func == ws:
-                token_func()
-                continue
-            else:
-                return token_func()
-
-        return Token(1, ListLexer.token_names[1])
+class DictPatternLexer(base.PatternLexer):
+    """
+    PatternLexer emitting DictLexer's token types
+    """
+    COMMA = DictLexer.COMMA
+    LBRACKET = DictLexer.LBRACKET
+    RBRACKET = DictLexer.RBRACKET
+    NAME = DictLexer.NAME
+    COLON = DictLexer.COLON
+    literals = DictLexer.literals
+    name_pattern = r'[^,{}: \t\r\n]+'
+    name_type = DictLexer.NAME
+    eof_type = 1
+    token_names = DictLexer.token_names
+    token_class = Token
+    parse_error = ParseError
 
 
 class DictParser(Parser):
     """
     DictParser
     """
-    def __init__(self, input_lexer):
-        Parser.__init__(self, input_lexer)
+    rules = ('dict', 'pairs', 'pair', 'key', 'value')
+
+    def __init__(self, input_lexer, builder=None, recover=False):
+        Parser.__init__(self, input_lexer, builder, recover)
 
     def dict(self):
         self.match(DictLexer.LBRACKET)
-        self.pairs()
+        pairs = self.pairs()
         self.match(DictLexer.RBRACKET)
+        if self.builder is not None:
+            return self.builder.dict(pairs)
 
     def pairs(self):
-        self.pair()
-        while self.lookahead.token_type == DictLexer.COMMA:
-            self.consume()
-            self.pair()
+        pairs = [self.pair()]
+        while True:
+            if self.lookahead.token_type == DictLexer.COMMA:
+                self.consume()
+                pair = self.pair()
+                if self.builder is not None:
+                    pairs.append(pair)
+            elif self.recover and self.lookahead.token_type not in (DictLexer.RBRACKET, 1):
+                self.error('Expect COMMA or RBRACKET; found {found}'.format(found=str(self.lookahead)))
+                self.resync()
+            else:
+                break
+
+        return pairs
 
     def pair(self):
-        self.key()
+        key = self.key()
         self.match(DictLexer.COLON)
-        self.value()
+        value = self.value()
+        if self.builder is not None:
+            return self.builder.pair(key, value)
 
     def key(self):
         if self.lookahead.token_type == DictLexer.NAME:
+            token = self.lookahead
             self.consume()
+            if self.builder is not None:
+                return self.builder.name(token)
         else:
-            raise ParseError('Key must be NAME; found: {found}'.format(found=str(self.lookahead)))
+            self.error('Key must be NAME; found: {found}'.format(found=str(self.lookahead)))
 
     def value(self):
         if self.lookahead.token_type == DictLexer.NAME:
+            token = self.lookahead
             self.consume()
+            if self.builder is not None:
+                return self.builder.name(token)
         elif self.lookahead.token_type == DictLexer.LBRACKET:
-            self.dict()
+            return self.dict()
         else:
-            raise ParseError('Expect NAME or dict; found: {found}'.format(found=str(self.lookahead)))
+            self.error('Expect NAME or dict; found: {found}'.format(found=str(self.lookahead)))
+            self.resync()
+
+    def iter_dict(self):
+        """Yield (event, text) pairs while the lexer is pulled token by token;
+           each key is a PAIR_KEY event followed by its value's events
+        """
+        self.match(DictLexer.LBRACKET)
+        yield START_DICT, '{'
+        depth = 1
+        expect_pair = True
+        while depth:
+            if expect_pair:
+                token = self.lookahead
+                self.match(DictLexer.NAME)
+                yield PAIR_KEY, token.string
+                self.match(DictLexer.COLON)
+                if self.lookahead.token_type == DictLexer.LBRACKET:
+                    self.consume()
+                    depth += 1
+                    yield START_DICT, '{'
+                    continue
+
+                token = self.lookahead
+                self.match(DictLexer.NAME)
+                yield NAME_EVENT, token.string
+                expect_pair = False
+            elif self.lookahead.token_type == DictLexer.COMMA:
+                self.consume()
+                expect_pair = True
+            else:
+                self.match(DictLexer.RBRACKET)
+                depth -= 1
+                yield END_DICT, '}'
 
 
 if __name__ == '__main__':
@@ -3,3 +3,17 @@ __author__ = 'kid143'
 
 from .constants import *
 from .lexer import *
+from .scanner import *
+from .buffer import *
+from .stream import *
+from .bytelexer import *
+from .window import *
+from .memo import *
+from .trace import *
+from .ll import *
+from .grammar import *
+from .builder import *
+from .events import *
+from .pool import *
+from .recovery import *
+from .profiler import *
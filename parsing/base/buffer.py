@@ -0,0 +1,74 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Token storage for parser lookahead
+"""
+
+from array import array
+
+from .constants import TOKEN_NAMES, EOF
+from .lexer import Token
+
+
+__all__ = ['TokenList', 'TokenBuffer']
+
+
+class TokenList(list):
+    """
+    Default lookahead storage: a plain list of Token objects
+    """
+    def token_type(self, i):
+        return self[i].token_type
+
+    def fill(self, input_lexer, n):
+        self.extend([input_lexer.next_token() for x in range(n)])
+
+    def discard(self, n):
+        del self[:n]
+
+
+class TokenBuffer(object):
+    """
+    Struct-of-arrays lookahead storage.
+
+    Token types are kept in an array('B') and (start, end) offsets into the lexer
+    input in two array('I'), so buffering a token copies no text and allocates no
+    object. Indexing builds the Token on demand through ``lexer.text()``.
+    """
+    def __init__(self, input_lexer):
+        self.lexer = input_lexer
+        self.types = array('B')
+        self.starts = array('I')
+        self.ends = array('I')
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, i):
+        token_type = self.types[i]
+        if token_type == EOF:
+            return Token(EOF, TOKEN_NAMES[EOF], self.starts[i])
+
+        return Token(token_type, self.lexer.text(self.starts[i], self.ends[i]), self.starts[i])
+
+    def token_type(self, i):
+        return self.types[i]
+
+    def fill(self, input_lexer, n):
+        for x in range(n):
+            token_type, start, end = input_lexer.next_span()
+            self.types.append(token_type)
+            self.starts.append(start)
+            self.ends.append(end)
+
+    def discard(self, n):
+        del self.types[:n]
+        del self.starts[:n]
+        del self.ends[:n]
+
+    def clear(self):
+        self.discard(len(self.types))
@@ -0,0 +1,127 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Builders turning parser rules into values
+"""
+
+from array import array
+
+
+__all__ = ['NODE_NAME', 'NODE_LIST', 'NODE_ASSIGN', 'NODE_DICT', 'NODE_PAIR', 'NO_NODE',
+           'NativeBuilder', 'NodeStore', 'BuildingParser']
+
+
+NODE_NAME = 0
+NODE_LIST = 1
+NODE_ASSIGN = 2
+NODE_DICT = 3
+NODE_PAIR = 4
+
+NO_NODE = -1
+
+
+class NativeBuilder(object):
+    """
+    Builds plain Python values: token strings for names, lists, dicts and
+    (target, value) tuples for assignments
+    """
+    def name(self, token):
+        return token.string
+
+    def list(self, items):
+        return items
+
+    def assignment(self, target, value):
+        return (target, value)
+
+    def dict(self, pairs):
+        return dict(pairs)
+
+    def pair(self, key, value):
+        return (key, value)
+
+
+class NodeStore(object):
+    """
+    Array backed tree builder.
+
+    A node is an index into the parallel arrays ``kinds``, ``first_child``,
+    ``next_sibling`` and ``text``; children are linked through first_child /
+    next_sibling and NAME text is an index into the interned ``strings``.
+    Every builder method returns the new node.
+    """
+    def __init__(self):
+        self.kinds = array('B')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.text = array('i')
+        self.strings = []
+        self.string_ids = {}
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def add(self, kind, children=(), text=NO_NODE):
+        node = len(self.kinds)
+        self.kinds.append(kind)
+        self.first_child.append(children[0] if children else NO_NODE)
+        self.next_sibling.append(NO_NODE)
+        self.text.append(text)
+        for previous, child in zip(children, children[1:]):
+            self.next_sibling[previous] = child
+        return node
+
+    def name(self, token):
+        string = token.string
+        text = self.string_ids.get(string)
+        if text is None:
+            text = self.string_ids[string] = len(self.strings)
+            self.strings.append(string)
+        return self.add(NODE_NAME, text=text)
+
+    def list(self, items):
+        return self.add(NODE_LIST, items)
+
+    def assignment(self, target, value):
+        return self.add(NODE_ASSIGN, (target, value))
+
+    def dict(self, pairs):
+        return self.add(NODE_DICT, pairs)
+
+    def pair(self, key, value):
+        return self.add(NODE_PAIR, (key, value))
+
+    def children(self, node):
+        child = self.first_child[node]
+        while child != NO_NODE:
+            yield child
+            child = self.next_sibling[child]
+
+    def to_native(self, node):
+        """Convert the subtree at node to the values NativeBuilder would build"""
+        kind = self.kinds[node]
+        if kind == NODE_NAME:
+            return self.strings[self.text[node]]
+
+        children = [self.to_native(child) for child in self.children(node)]
+        if kind == NODE_LIST:
+            return children
+        if kind == NODE_DICT:
+            return dict(children)
+        return tuple(children)
+
+
+class BuildingParser(object):
+    """
+    Mixin for backtracking parsers with an optional builder; rules only call it
+    when ``building``, so nothing is built during speculation that may roll back
+    """
+    builder = None
+
+    @property
+    def building(self):
+        return self.builder is not None and not self.markers
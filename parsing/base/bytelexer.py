@@ -0,0 +1,122 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Lexer over bytes, mmap and memoryview input
+"""
+
+import re
+
+from .constants import TOKEN_NAMES, LITERALS, EMPTY, EOF, NAME
+from .lexer import ParseError, Token, Lexer
+
+
+__all__ = ['ByteToken', 'ByteLexer']
+
+
+INVALID = -1
+
+
+class ByteToken(Token):
+    """
+    NAME token that keeps (start, end) offsets into the source bytes and only
+    decodes its text when ``string`` is read
+    """
+    __slots__ = ('data', 'end')
+
+    def __init__(self, token_type, data, start, end):
+        self.token_type = token_type
+        self.data = data
+        self.start = start
+        self.end = end
+
+    @property
+    def string(self):
+        return str(self.data[self.start:self.end], 'ascii')
+
+
+class ByteLexer(Lexer):
+    """
+    Lexer working directly on a bytes-like object such as an mmap of a file.
+
+    Each byte is classified through a 256 entry table built once per class from
+    ``literals``; whitespace and NAME runs are skipped with one regex match, and
+    nothing is decoded until a parser asks for ``Token.string``.
+    """
+    literals = LITERALS
+    name_run = re.compile(rb'[A-Za-z]+')
+    ws_run = re.compile(rb'[ \t\r\n]*')
+
+    def __init__(self, data):
+        self.reset(data)
+
+    def reset(self, data):
+        self.input_string = data
+        self.n = len(data)
+        self.p = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.compile()
+
+    @classmethod
+    def compile(cls):
+        table = [INVALID] * 256
+        for char in EMPTY:
+            table[ord(char)] = None
+        for char, token_type in cls.literals.items():
+            table[ord(char)] = token_type
+        for b in range(256):
+            if cls.name_run.match(bytes([b])):
+                table[b] = NAME
+        cls.table = tuple(table)
+
+    @property
+    def c(self):
+        if self.p < self.n:
+            return chr(self.input_string[self.p])
+        return None
+
+    def advance(self):
+        self.p += 1
+
+    def ws(self):
+        self.p = self.ws_run.match(self.input_string, self.p).end()
+
+    def next_span(self):
+        data = self.input_string
+        p = self.p
+        while p < self.n:
+            token_type = self.table[data[p]]
+            if token_type is None:
+                p = self.ws_run.match(data, p).end()
+            elif token_type == NAME:
+                self.p = self.name_run.match(data, p).end()
+                return NAME, p, self.p
+            elif token_type == INVALID:
+                self.p = p
+                raise ParseError('invalid character {c!r} at {pos}'.format(c=self.c, pos=p))
+            else:
+                self.p = p + 1
+                return token_type, p, self.p
+
+        self.p = p
+        return EOF, p, p
+
+    def next_token(self):
+        token_type, start, end = self.next_span()
+        if token_type == NAME:
+            return ByteToken(NAME, self.input_string, start, end)
+        if token_type == EOF:
+            return Token(EOF, TOKEN_NAMES[EOF], start)
+
+        return Token(token_type, chr(self.input_string[start]), start)
+
+    def text(self, start, end):
+        return str(self.input_string[start:end], 'ascii')
+
+
+ByteLexer.compile()
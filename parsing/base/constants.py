@@ -36,4 +36,18 @@ NAME = 12
 
 EMPTY = [' ', '\t', '\r', '\n']
 
+LITERALS = {
+    ',': COMMA,
+    '[': LSQRTBRACKET,
+    ']': RSQRTBRACKET,
+    '(': LRNDBRACKET,
+    ')': RRNDBRACKET,
+    '{': LBRBRACKET,
+    '}': RBRBRACKET,
+    ':': COLON,
+    '.': DOT,
+    ';': SEP,
+    '=': EQUALS
+}
+
 MEMO_FAILED = -1
@@ -0,0 +1,22 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Event kinds yielded by the streaming parse generators
+"""
+
+__all__ = ['START_LIST', 'END_LIST', 'START_DICT', 'END_DICT', 'NAME_EVENT', 'PAIR_KEY', 'ASSIGN',
+           'END_RECORD']
+
+
+START_LIST = 'start_list'
+END_LIST = 'end_list'
+START_DICT = 'start_dict'
+END_DICT = 'end_dict'
+NAME_EVENT = 'name'
+PAIR_KEY = 'pair_key'
+ASSIGN = 'assign'
+END_RECORD = 'end_record'
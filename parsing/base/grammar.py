@@ -0,0 +1,166 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Grammar DSL and LL(k) prediction table compiler
+"""
+
+import re
+
+from .constants import EOF
+
+
+__all__ = ['GrammarError', 'Grammar']
+
+
+class GrammarError(Exception):
+    pass
+
+
+def parse_rules(text):
+    """Parse ``name : alt | alt ;`` rules into a list of (name, [alternatives]).
+
+    An alternative is a whitespace separated list of symbols and may be empty.
+    Everything after '#' on a line is a comment.
+    """
+    text = re.sub(r'#[^\n]*', '', text)
+    rules = []
+    for statement in text.split(';'):
+        if not statement.strip():
+            continue
+        if ':' not in statement:
+            raise GrammarError('expecting name : alternatives; found {fnd!r}'.format(fnd=statement.strip()))
+
+        name, body = statement.split(':', 1)
+        name = name.strip()
+        if not re.match(r'^\w+$', name):
+            raise GrammarError('invalid rule name {name!r}'.format(name=name))
+
+        rules.append((name, [tuple(alternative.split()) for alternative in body.split('|')]))
+
+    if not rules:
+        raise GrammarError('empty grammar')
+
+    return rules
+
+
+def concat(k, left, right):
+    """k-truncated concatenation of two sets of token type tuples"""
+    result = set()
+    for a in left:
+        if len(a) >= k:
+            result.add(a[:k])
+        else:
+            for b in right:
+                result.add((a + b)[:k])
+
+    return result
+
+
+class Grammar(object):
+    """
+    LL(k) grammar compiled from the rule DSL.
+
+    ``token_names`` maps token types to the terminal names usable in rules
+    (the type is the index, as in TOKEN_NAMES); 'EOF' always names ``eof``.
+    The first rule is the start symbol and is followed by end of input.
+
+    For every rule the compiler computes FIRST_k/FOLLOW_k and the prediction set
+    of each alternative, then picks the smallest j <= k for which the sets are
+    disjoint. ``table`` is in the format TableParser expects: rule ->
+    (j, {la(1) or (la(1), ..., la(j)): right hand side}).
+    """
+    def __init__(self, text, token_names, k=1, eof=EOF):
+        self.k = k
+        self.eof = eof
+        self.terminals = dict((name, token_type) for token_type, name in enumerate(token_names))
+        self.terminals['EOF'] = eof
+
+        rules = parse_rules(text)
+        self.start = rules[0][0]
+        names = set(name for name, alternatives in rules)
+        self.rules = {}
+        for name, alternatives in rules:
+            if name in self.rules:
+                raise GrammarError('rule {name} defined twice'.format(name=name))
+            self.rules[name] = [tuple(self.symbol(s, names) for s in alternative) for alternative in alternatives]
+
+        self.first = self.compute_first()
+        self.follow = self.compute_follow()
+        self.table = self.compute_table()
+
+    def symbol(self, s, names):
+        if s in names:
+            return s
+        if s in self.terminals:
+            return self.terminals[s]
+        raise GrammarError('unknown symbol {s}'.format(s=s))
+
+    def first_k(self, symbols, first):
+        result = {()}
+        for s in symbols:
+            if all(len(t) >= self.k for t in result):
+                break
+            result = concat(self.k, result, {(s,)} if s.__class__ is int else first[s])
+
+        return result
+
+    def compute_first(self):
+        first = dict((name, set()) for name in self.rules)
+        changed = True
+        while changed:
+            changed = False
+            for name, alternatives in self.rules.items():
+                for alternative in alternatives:
+                    new = self.first_k(alternative, first) - first[name]
+                    if new:
+                        first[name] |= new
+                        changed = True
+
+        return first
+
+    def compute_follow(self):
+        follow = dict((name, set()) for name in self.rules)
+        follow[self.start].add((self.eof,) * self.k)
+        changed = True
+        while changed:
+            changed = False
+            for name, alternatives in self.rules.items():
+                for alternative in alternatives:
+                    for i, s in enumerate(alternative):
+                        if s.__class__ is int:
+                            continue
+                        new = concat(self.k, self.first_k(alternative[i + 1:], self.first), follow[name]) - follow[s]
+                        if new:
+                            follow[s] |= new
+                            changed = True
+
+        return follow
+
+    def compute_table(self):
+        table = {}
+        for name, alternatives in self.rules.items():
+            predictions = [concat(self.k, self.first_k(alternative, self.first), self.follow[name])
+                           for alternative in alternatives]
+            for j in range(1, self.k + 1):
+                choices = {}
+                # alternatives are told apart by index: two equal alternatives
+                # of one rule are still ambiguous
+                owners = {}
+                conflict = False
+                for index, (alternative, prediction) in enumerate(zip(alternatives, predictions)):
+                    for t in prediction:
+                        key = t[0] if j == 1 else t[:j]
+                        if owners.setdefault(key, index) != index:
+                            conflict = True
+                        choices[key] = alternative
+                if not conflict:
+                    table[name] = (j, choices)
+                    break
+            else:
+                raise GrammarError('rule {name} is not LL({k})'.format(name=name, k=self.k))
+
+        return table
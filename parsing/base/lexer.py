@@ -8,7 +8,7 @@ __author__ = 'kid143'
 """This is base components
 """
 
-from .constants import TOKEN_NAMES
+from .constants import TOKEN_NAMES, EMPTY, EOF, NAME
 
 
 class ParseError(Exception):
@@ -17,11 +17,14 @@ class ParseError(Exception):
 
 class Token(object):
     """
-    Token object
+    Token object; start is its offset in the input, -1 if unknown
     """
-    def __init__(self, token_type, string):
+    __slots__ = ('token_type', 'string', 'start')
+
+    def __init__(self, token_type, string, start=-1):
         self.token_type = token_type
         self.string = string
+        self.start = start
 
     def __str__(self):
         return "<Token type: {type}, string: '{string}'>".format(type=TOKEN_NAMES[self.token_type],
@@ -31,11 +34,27 @@ class Token(object):
 class Lexer(object):
     """
     Lexer base class
+
+    Subclasses declare their single character tokens in ``literals``; the
+    dispatch table mapping characters to token types is built once per class.
+    Whitespace maps to None and any other character starts a NAME.
     """
+    literals = {}
+    dispatch = dict.fromkeys(EMPTY)
+
     def __init__(self, input_string):
+        self.reset(input_string)
+
+    def reset(self, input_string):
+        """Start over on input_string so the lexer can be reused"""
         self.input_string = input_string
         self.p = 0
-        self.c = self.input_string[self.p]
+        self.c = input_string[0] if input_string else None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.dispatch = dict.fromkeys(EMPTY)
+        cls.dispatch.update(cls.literals)
 
     def consume(self):
         self.advance()
@@ -58,7 +77,66 @@ class Lexer(object):
             raise ParseError('Expect {expect}; found:{found}'.format(expect=x, found=self.c))
 
     def next_token(self):
-        raise NotImplementedError
+        dispatch = self.dispatch
+        while self.c is not None:
+            token_type = dispatch.get(self.c, NAME)
+            if token_type is None:
+                self.ws()
+            elif token_type == NAME:
+                return self.name_token()
+            else:
+                c = self.c
+                start = self.p
+                self.consume()
+                return Token(token_type, c, start)
+
+        return Token(EOF, TOKEN_NAMES[EOF], self.p)
+
+    def next_span(self):
+        """Like next_token(), but return (token_type, start, end) offsets into the
+           input instead of building a Token.
+        """
+        dispatch = self.dispatch
+        while self.c is not None:
+            token_type = dispatch.get(self.c, NAME)
+            if token_type is None:
+                self.ws()
+            elif token_type == NAME:
+                start = self.p
+                return NAME, start, self.scan_name()
+            else:
+                start = self.p
+                self.consume()
+                return token_type, start, start + 1
+
+        return EOF, self.p, self.p
+
+    def name_token(self):
+        start = self.p
+        return Token(NAME, self.input_string[start:self.scan_name()], start)
+
+    def scan_name(self):
+        """Advance over a NAME and the whitespace after it, returning the end offset of the NAME"""
+        start = self.p
+        while self.c is not None and self.is_letter():
+            self.advance()
+        if self.p == start:
+            raise ParseError('invalid character {c!r} at {pos}'.format(c=self.c, pos=self.p))
+
+        end = self.p
+        self.ws()
+        return end
+
+    def text(self, start, end):
+        return self.input_string[start:end]
 
     def ws(self):
-        raise NotImplementedError
\ No newline at end of file
+        while self.c in EMPTY:
+            self.advance()
+
+    def is_letter(self):
+        return 'a' <= self.c <= 'z' or 'A' <= self.c <= 'Z'
+
+    def letter(self):
+        if self.is_letter():
+            self.consume()
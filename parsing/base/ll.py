@@ -0,0 +1,78 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Table driven LL(k) parsing with an explicit stack
+"""
+
+from .lexer import ParseError
+from .window import LookaheadWindow
+
+
+__all__ = ['TableParser']
+
+
+class TableParser(LookaheadWindow):
+    """
+    Explicit stack LL(k) driver.
+
+    ``table`` maps every nonterminal to (k, choices), where choices maps la(1)
+    (k == 1) or the tuple la(1)..la(k) to a right hand side. Terminals are token
+    types (ints) and nonterminals are strs. Subclasses either write the table
+    by hand or set ``grammar`` to a compiled Grammar, whose start symbol must
+    then be followed by ``eof`` like the grammar assumes. Right hand sides are
+    reversed once per class, so a prediction is one dict lookup plus one list
+    extend, and nesting only grows the symbol stack, never the Python stack.
+    """
+    grammar = None
+    table = {}
+    start = None
+    eof = None
+    token_names = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if cls.grammar is not None:
+            cls.table = cls.grammar.table
+            cls.start = cls.grammar.start
+            cls.eof = cls.grammar.eof
+        cls.predict = dict(
+            (nonterminal, (k, dict((key, tuple(reversed(rhs))) for key, rhs in choices.items())))
+            for nonterminal, (k, choices) in cls.table.items()
+        )
+        if cls.table:
+            cls.k = max(k for k, choices in cls.table.values())
+
+    def parse(self, start=None):
+        predict = self.predict
+        lookahead = self.lookahead
+        start = start or self.start
+        stack = [start]
+        if start == self.start and self.eof is not None:
+            stack.insert(0, self.eof)
+        pop = stack.pop
+        extend = stack.extend
+        while stack:
+            symbol = pop()
+            token_type = lookahead[self.p].token_type
+            if symbol.__class__ is int:
+                if token_type != symbol:
+                    raise ParseError('expecting {exp} found {fnd}'.format(
+                        exp='EOF' if symbol == self.eof else self.token_names[symbol], fnd=self.lt(1)))
+                self.consume()
+                continue
+
+            k, choices = predict[symbol]
+            if k == 1:
+                rhs = choices.get(token_type)
+            elif k == 2:
+                rhs = choices.get((token_type, self.la(2)))
+            else:
+                rhs = choices.get(tuple(self.la(i) for i in range(1, k + 1)))
+            if rhs is None:
+                raise ParseError('expecting {symbol} found {fnd}'.format(symbol=symbol, fnd=self.lt(1)))
+
+            extend(rhs)
@@ -0,0 +1,160 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Packrat memoization for backtracking parsers
+"""
+
+import functools
+from collections import OrderedDict
+
+
+__all__ = ['memoized_rule', 'MemoTable', 'WindowMemoTable', 'LRUMemoTable', 'PackratParser']
+
+
+def memoized_rule(rule=None, cheap=False):
+    """Memoize a rule method of a PackratParser while it speculates.
+
+    The outcome of the rule at a start token index is stored under the key
+    ``index * memo_rule_count + rule id``; the parser supplies
+    ``alreadyParsedRule(key)`` and ``memoize(key, failed)`` to look it up and
+    record it. Rules marked ``cheap`` are skipped by tables created with
+    ``memoize_cheap=False``. Parsers setting ``memoize_always`` consult the
+    table outside speculation too.
+    """
+    if rule is None:
+        return functools.partial(memoized_rule, cheap=cheap)
+
+    name = rule.__name__
+
+    @functools.wraps(rule)
+    def memoized(self):
+        if not (self.markers or self.memoize_always) or (cheap and not self.memo.memoize_cheap):
+            return rule(self)
+
+        key = self.index() * self.memo_rule_count + self.memo_rule_ids[name]
+        if self.alreadyParsedRule(key):
+            return
+
+        failed = True
+        try:
+            rule(self)
+            failed = False
+        finally:
+            self.memoize(key, failed)
+
+    memoized.memo_rule = name
+    return memoized
+
+
+class MemoTable(object):
+    """
+    Memo table mapping packed (rule, start index) keys to stop indexes.
+
+    Entries live until the parser compacts its window outside speculation,
+    which clears the table. Lookups count hits and misses and the peak size is
+    tracked, see stats().
+    """
+    def __init__(self, memoize_cheap=True):
+        self.entries = {}
+        self.memoize_cheap = memoize_cheap
+        self.hits = 0
+        self.misses = 0
+        self.peak = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        stop = self.entries.get(key)
+        if stop is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return stop
+
+    def put(self, key, stop):
+        self.entries[key] = stop
+        if len(self.entries) > self.peak:
+            self.peak = len(self.entries)
+
+    def evict(self, floor_key, speculating):
+        """Called when the token window drops everything below the key floor_key"""
+        if not speculating:
+            self.entries.clear()
+
+    def clear(self):
+        self.entries.clear()
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            'size': len(self.entries),
+            'peak': self.peak,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate
+        }
+
+
+class WindowMemoTable(MemoTable):
+    """
+    Memo table that drops every entry starting behind the oldest active marker
+    whenever the token window compacts, including during speculation.
+    """
+    def evict(self, floor_key, speculating):
+        self.entries = dict((key, stop) for key, stop in self.entries.items() if key >= floor_key)
+
+
+class LRUMemoTable(MemoTable):
+    """
+    Memo table holding at most maxsize entries, evicting the least recently used.
+    """
+    def __init__(self, maxsize, memoize_cheap=True):
+        MemoTable.__init__(self, memoize_cheap)
+        self.entries = OrderedDict()
+        self.maxsize = maxsize
+
+    def get(self, key):
+        stop = MemoTable.get(self, key)
+        if stop is not None:
+            self.entries.move_to_end(key)
+        return stop
+
+    def put(self, key, stop):
+        if key not in self.entries and len(self.entries) >= self.maxsize:
+            self.entries.popitem(last=False)
+        MemoTable.put(self, key, stop)
+
+
+class PackratParser(object):
+    """
+    Mixin numbering the memoized rules of a parser class.
+
+    memo_rule_ids maps each @memoized_rule method name to an id and
+    memo_rule_count is the key stride, so every (rule, token index) pair packs
+    into a single int key of one memo table.
+    """
+    memoize_always = False
+    memo_rule_ids = {}
+    memo_rule_names = ()
+    memo_rule_count = 1
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        names = []
+        for klass in reversed(cls.__mro__):
+            for name, value in vars(klass).items():
+                if getattr(value, 'memo_rule', None) and name not in names:
+                    names.append(name)
+
+        cls.memo_rule_ids = dict((name, i) for i, name in enumerate(names))
+        cls.memo_rule_names = tuple(names)
+        cls.memo_rule_count = max(len(names), 1)
@@ -0,0 +1,60 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Per thread reuse of lexer/parser pairs
+"""
+
+import threading
+from contextlib import contextmanager
+
+
+__all__ = ['ParserPool']
+
+
+class ParserPool(object):
+    """
+    Thread local free lists of parsers built by ``factory()``.
+
+    ``acquire(input_string)`` hands out a parser reset to input_string and
+    ``release()`` takes it back, so each thread builds only as many parsers as
+    it uses at the same time; ``parser()`` wraps the pair in a with block. The
+    factory should build on empty input, e.g.
+    ``lambda: MemoBacktrackParser(PatternLexer(''))``.
+    """
+    def __init__(self, factory):
+        self.factory = factory
+        self.local = threading.local()
+
+    @property
+    def free(self):
+        try:
+            return self.local.free
+        except AttributeError:
+            free = self.local.free = []
+            return free
+
+    def acquire(self, input_string):
+        free = self.free
+        parser = free.pop() if free else self.factory()
+        try:
+            parser.reset(input_string)
+        except Exception:
+            free.append(parser)
+            raise
+
+        return parser
+
+    def release(self, parser):
+        self.free.append(parser)
+
+    @contextmanager
+    def parser(self, input_string):
+        parser = self.acquire(input_string)
+        try:
+            yield parser
+        finally:
+            self.release(parser)
@@ -0,0 +1,185 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Opt-in per rule profiling
+"""
+
+import time
+from collections import Counter, defaultdict
+
+from .constants import TOKEN_NAMES
+from .trace import SPECULATE_START, SPECULATE_SUCCESS, SPECULATE_FAIL, MEMO_HIT, MEMO_MISS
+
+
+__all__ = ['RuleStats', 'Profiler']
+
+
+class RuleStats(object):
+    """
+    Totals for one rule: calls, inclusive seconds and inclusive tokens
+    consumed (both from the outermost activation only, so recursion is not
+    counted twice) and exclusive seconds
+    """
+    __slots__ = ('calls', 'inclusive', 'exclusive', 'tokens')
+
+    def __init__(self):
+        self.calls = 0
+        self.inclusive = 0.0
+        self.exclusive = 0.0
+        self.tokens = 0
+
+
+class Profiler(object):
+    """
+    Collects per rule and per lexer counters from the parsers attached to it.
+
+    attach() installs wrappers on the parser instance only: its rule methods
+    (``rules`` of the parser class unless given), ``consume`` to count tokens,
+    the lexer's ``next_token``/``next_span`` for tokens by type and characters
+    scanned, and itself as the tracer for speculation and memo events. A
+    parser that was never attached runs the unmodified class code. Counting
+    starts at attach(), so tokens the parser buffered when it was built are not
+    seen by the lexer counters. Tokens are counted as consumed, so tokens a
+    speculation later rewinds are included.
+    Speculation ``rollbacks`` are the attempts that failed.
+    """
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.rules = defaultdict(RuleStats)
+        self.stacks = Counter()
+        self.attempts = Counter()
+        self.successes = Counter()
+        self.rollbacks = Counter()
+        self.memo_hits = Counter()
+        self.memo_misses = Counter()
+        self.token_types = Counter()
+        self.scanned = 0
+        self.consumed = 0
+        self.frames = []
+        self.active = Counter()
+
+    def attach(self, parser, rules=None):
+        for name in rules if rules is not None else parser.rules:
+            setattr(parser, name, self.profiled_rule(getattr(parser, name), name))
+        parser.consume = self.counted_consume(parser.consume)
+        if hasattr(parser, 'tracer'):
+            parser.tracer = self
+
+        lexer = parser.lexer
+        names = getattr(lexer, 'token_names', TOKEN_NAMES)
+        for method in ('next_token', 'next_span'):
+            if hasattr(lexer, method):
+                setattr(lexer, method, self.counted_lex(lexer, getattr(lexer, method), names))
+        return parser
+
+    def detach(self, parser, rules=None):
+        """Remove every wrapper attach() installed"""
+        for name in rules if rules is not None else parser.rules:
+            parser.__dict__.pop(name, None)
+        parser.__dict__.pop('consume', None)
+        parser.__dict__.pop('tracer', None)
+        parser.lexer.__dict__.pop('next_token', None)
+        parser.lexer.__dict__.pop('next_span', None)
+
+    def profiled_rule(self, rule, name):
+        clock = self.clock
+        frames = self.frames
+        active = self.active
+        stats = self.rules[name]
+
+        def profiled(*args):
+            # frame: [name, start, child seconds, consumed at start]
+            frame = [name, clock(), 0.0, self.consumed]
+            frames.append(frame)
+            active[name] += 1
+            try:
+                return rule(*args)
+            finally:
+                elapsed = clock() - frame[1]
+                frames.pop()
+                active[name] -= 1
+                exclusive = elapsed - frame[2]
+                stats.calls += 1
+                stats.exclusive += exclusive
+                if not active[name]:
+                    stats.inclusive += elapsed
+                    stats.tokens += self.consumed - frame[3]
+                if frames:
+                    frames[-1][2] += elapsed
+                self.stacks[tuple(f[0] for f in frames) + (name,)] += exclusive
+
+        return profiled
+
+    def counted_consume(self, consume):
+        def counted(*args):
+            self.consumed += 1
+            return consume(*args)
+
+        return counted
+
+    def counted_lex(self, lexer, next_token, names):
+        def counted():
+            start = lexer.p
+            token = next_token()
+            self.scanned += lexer.p - start
+            token_type = token[0] if token.__class__ is tuple else token.token_type
+            self.token_types[names[token_type]] += 1
+            return token
+
+        return counted
+
+    def event(self, kind, name, index):
+        if kind == SPECULATE_START:
+            self.attempts[name] += 1
+        elif kind == SPECULATE_SUCCESS:
+            self.successes[name] += 1
+        elif kind == SPECULATE_FAIL:
+            self.rollbacks[name] += 1
+        elif kind == MEMO_HIT:
+            self.memo_hits[name] += 1
+        elif kind == MEMO_MISS:
+            self.memo_misses[name] += 1
+
+    def table(self):
+        """Summary as text: rules by exclusive time, then speculation, memo and lexer counters"""
+        total = sum(stats.exclusive for stats in self.rules.values()) or 1.0
+        lines = ['{0:<16}{1:>10}{2:>12}{3:>12}{4:>8}{5:>13}'.format(
+            'rule', 'calls', 'incl ms', 'excl ms', 'excl %', 'incl tokens')]
+        for name, stats in sorted(self.rules.items(), key=lambda item: -item[1].exclusive):
+            lines.append('{0:<16}{1:>10}{2:>12.3f}{3:>12.3f}{4:>7.1f}%{5:>13}'.format(
+                name, stats.calls, stats.inclusive * 1000, stats.exclusive * 1000,
+                stats.exclusive / total * 100, stats.tokens))
+
+        if self.attempts:
+            lines.append('')
+            lines.append('{0:<16}{1:>10}{2:>12}{3:>12}'.format('speculation', 'attempts', 'successes', 'rollbacks'))
+            for name in sorted(self.attempts):
+                lines.append('{0:<16}{1:>10}{2:>12}{3:>12}'.format(
+                    name, self.attempts[name], self.successes[name], self.rollbacks[name]))
+
+        if self.memo_hits or self.memo_misses:
+            lines.append('')
+            lines.append('{0:<16}{1:>10}{2:>12}'.format('memo', 'hits', 'misses'))
+            for name in sorted(set(self.memo_hits) | set(self.memo_misses)):
+                lines.append('{0:<16}{1:>10}{2:>12}'.format(name, self.memo_hits[name], self.memo_misses[name]))
+
+        lines.append('')
+        lines.append('lexer: {tokens} tokens, {scanned} characters scanned, {consumed} consumed'.format(
+            tokens=sum(self.token_types.values()), scanned=self.scanned, consumed=self.consumed))
+        for name, count in self.token_types.most_common():
+            lines.append('  {0:<14}{1:>10}'.format(name, count))
+        return '\n'.join(lines)
+
+    def collapsed(self):
+        """Lines of ``rule;rule;rule microseconds`` for flame graph tools"""
+        return ['{stack} {us}'.format(stack=';'.join(stack), us=int(round(seconds * 1e6)))
+                for stack, seconds in sorted(self.stacks.items())]
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            for line in self.collapsed():
+                f.write(line + '\n')
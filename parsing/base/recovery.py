@@ -0,0 +1,132 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Panic mode error recovery
+"""
+
+from .constants import EOF, LSQRTBRACKET, RSQRTBRACKET
+from .lexer import ParseError
+
+
+__all__ = ['ErrorRecord', 'RecoveringLexer', 'RecoveringParser']
+
+
+class ErrorRecord(object):
+    """
+    One syntax error: the offset of the offending token, the message and the
+    text found there
+    """
+    __slots__ = ('offset', 'message', 'found')
+
+    def __init__(self, offset, message, found=None):
+        self.offset = offset
+        self.message = message
+        self.found = found
+
+    def __str__(self):
+        return '{offset}: {message}'.format(offset=self.offset, message=self.message)
+
+    def __repr__(self):
+        return 'ErrorRecord({offset}, {message!r})'.format(offset=self.offset, message=self.message)
+
+
+class RecoveringLexer(object):
+    """
+    Wraps a lexer so an invalid character is recorded in errors and skipped
+    instead of raising. resumed_at is the offset of the token read right after
+    the last skip, where the parser would only report a follow-on error.
+    lexer_error is the exception (or tuple) the wrapped lexer raises for a bad
+    character.
+    """
+    resumed_at = None
+
+    def __init__(self, input_lexer, errors, lexer_error=ParseError):
+        self.lexer = input_lexer
+        self.errors = errors
+        self.lexer_error = lexer_error
+
+    def __getattr__(self, name):
+        return getattr(self.lexer, name)
+
+    def reset(self, input):
+        self.resumed_at = None
+        self.lexer.reset(input)
+
+    def next_token(self):
+        skipped = False
+        while True:
+            try:
+                token = self.lexer.next_token()
+            except self.lexer_error as e:
+                self.skip(e)
+                skipped = True
+                continue
+            if skipped:
+                self.resumed_at = token.start
+            return token
+
+    def next_span(self):
+        skipped = False
+        while True:
+            try:
+                span = self.lexer.next_span()
+            except self.lexer_error as e:
+                self.skip(e)
+                skipped = True
+                continue
+            if skipped:
+                self.resumed_at = span[1]
+            return span
+
+    def skip(self, e):
+        self.errors.append(ErrorRecord(self.lexer.p, str(e), self.lexer.c))
+        self.lexer.advance()
+
+
+class RecoveringParser(object):
+    """
+    Mixin for window parsers that can record errors and resynchronize.
+
+    With ``recover`` set, error() appends an ErrorRecord for the current token
+    instead of raising, once per offending token and not for the token right
+    after a skipped invalid character; resync() skips to a token of the follow
+    set at the current bracket depth. Speculating parsers always
+    raise, so a failed alternative still backtracks.
+    """
+    recover = False
+    errors = ()
+    open_type = LSQRTBRACKET
+    close_type = RSQRTBRACKET
+
+    @property
+    def recovering(self):
+        return self.recover and not self.markers
+
+    def error(self, message):
+        if not self.recovering:
+            raise ParseError(message)
+
+        token = self.lt(1)
+        if self.errors and self.errors[-1].offset == token.start:
+            return
+        if getattr(self.lexer, 'resumed_at', None) == token.start:
+            return
+
+        self.errors.append(ErrorRecord(token.start, message, token.string))
+
+    def resync(self, follow):
+        """Skip tokens until la(1) is EOF or in follow outside any bracket opened here"""
+        depth = 0
+        while True:
+            token_type = self.la(1)
+            if token_type == EOF or (depth == 0 and token_type in follow):
+                return
+            if token_type == self.open_type:
+                depth += 1
+            elif token_type == self.close_type and depth > 0:
+                depth -= 1
+            self.consume()
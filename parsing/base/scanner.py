@@ -0,0 +1,107 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Table driven bulk tokenizer
+"""
+
+import re
+
+from .constants import TOKEN_NAMES, LITERALS, EMPTY, EOF, NAME
+from .lexer import ParseError, Token, Lexer
+
+
+__all__ = ['PatternLexer']
+
+
+class PatternLexer(Lexer):
+    """
+    Lexer driven by one compiled master pattern.
+
+    The pattern is built once per class from ``literals`` (character -> token type)
+    and ``name_pattern``, so leading whitespace and the whole token are scanned by
+    a single match call instead of one ``advance()`` per character. Subclasses
+    set ``name_type``, ``eof_type``, ``token_names``, ``token_class`` and
+    ``parse_error`` to emit another parser's token numbering and exception,
+    see the PatternLexers of the recursive-descent parsers.
+    """
+    literals = LITERALS
+    name_pattern = '[a-zA-Z]+'
+    name_type = NAME
+    eof_type = EOF
+    token_names = TOKEN_NAMES
+    token_class = Token
+    parse_error = ParseError
+
+    def __init__(self, input_string):
+        self.reset(input_string)
+
+    def reset(self, input_string):
+        self.input_string = input_string
+        self.p = 0
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls.compile()
+
+    @classmethod
+    def compile(cls):
+        ws = '[{chars}]*'.format(chars=re.escape(''.join(EMPTY)))
+        alternatives = []
+        types = [None]
+        texts = [None]
+        for char, token_type in cls.literals.items():
+            alternatives.append('({lit})'.format(lit=re.escape(char)))
+            types.append(token_type)
+            texts.append(char)
+
+        alternatives.append('({name})'.format(name=cls.name_pattern))
+        types.append(cls.name_type)
+        texts.append(None)
+
+        alternatives.append('($)')
+        types.append(cls.eof_type)
+        texts.append(cls.token_names[cls.eof_type])
+
+        cls.pattern = re.compile('{ws}(?:{alts})'.format(ws=ws, alts='|'.join(alternatives)))
+        cls.ws_pattern = re.compile(ws)
+        cls.group_types = tuple(types)
+        cls.group_texts = tuple(texts)
+
+    @property
+    def c(self):
+        if self.p < len(self.input_string):
+            return self.input_string[self.p]
+        return None
+
+    def advance(self):
+        self.p += 1
+
+    def ws(self):
+        self.p = self.ws_pattern.match(self.input_string, self.p).end()
+
+    def next_token(self):
+        m = self.pattern.match(self.input_string, self.p)
+        if m is None:
+            self.ws()
+            raise self.parse_error('invalid character {c!r} at {pos}'.format(c=self.c, pos=self.p))
+
+        self.p = m.end()
+        group = m.lastindex
+        return self.token_class(self.group_types[group], self.group_texts[group] or m.group(group), m.start(group))
+
+    def next_span(self):
+        m = self.pattern.match(self.input_string, self.p)
+        if m is None:
+            self.ws()
+            raise self.parse_error('invalid character {c!r} at {pos}'.format(c=self.c, pos=self.p))
+
+        self.p = m.end()
+        group = m.lastindex
+        return self.group_types[group], m.start(group), m.end(group)
+
+
+PatternLexer.compile()
@@ -0,0 +1,132 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Streaming lexer over files and chunk iterables
+"""
+
+import codecs
+
+from .lexer import ParseError
+from .scanner import PatternLexer
+
+
+__all__ = ['iter_chunks', 'StreamLexer']
+
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+
+def iter_chunks(source, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+    """Yield text chunks from a str, a file object, an mmap or an iterable of
+       str/bytes chunks. Bytes are decoded incrementally, so a multi byte
+       character may be split across chunks.
+    """
+    if isinstance(source, str):
+        chunks = [source]
+    elif hasattr(source, 'read'):
+        chunks = iter(lambda: source.read(chunk_size), source.read(0))
+    else:
+        chunks = source
+
+    decoder = None
+    for chunk in chunks:
+        if not isinstance(chunk, str):
+            if decoder is None:
+                decoder = codecs.getincrementaldecoder(encoding)()
+            chunk = decoder.decode(chunk)
+        if chunk:
+            yield chunk
+
+    if decoder is not None:
+        tail = decoder.decode(b'', True)
+        if tail:
+            yield tail
+
+
+class StreamLexer(PatternLexer):
+    """
+    PatternLexer reading from a file object, an mmap or an iterator of chunks.
+
+    Only the unconsumed tail of the input plus one chunk is kept in
+    ``input_string``; ``p`` stays an absolute offset into the stream. A match
+    that reaches the end of the buffer is retried after a refill, so tokens
+    crossing chunk boundaries come out whole.
+    """
+    def __init__(self, source, chunk_size=DEFAULT_CHUNK_SIZE, encoding='utf-8'):
+        self.chunk_size = chunk_size
+        self.encoding = encoding
+        self.reset(source)
+
+    def reset(self, source):
+        self.chunks = iter_chunks(source, self.chunk_size, self.encoding)
+        self.input_string = ''
+        self.offset = 0
+        self.i = 0
+        self.exhausted = False
+
+    @property
+    def p(self):
+        return self.offset + self.i
+
+    @property
+    def c(self):
+        if self.i == len(self.input_string) and not self.refill():
+            return None
+
+        return self.input_string[self.i]
+
+    def refill(self):
+        """Drop the consumed text and append the next chunk. Return False at end of stream."""
+        if self.exhausted:
+            return False
+
+        chunk = next(self.chunks, None)
+        if chunk is None:
+            self.exhausted = True
+            return False
+
+        self.offset += self.i
+        self.input_string = self.input_string[self.i:] + chunk
+        self.i = 0
+        return True
+
+    def advance(self):
+        self.i += 1
+
+    def ws(self):
+        self.i = self.ws_pattern.match(self.input_string, self.i).end()
+        while self.i == len(self.input_string) and self.refill():
+            self.i = self.ws_pattern.match(self.input_string, self.i).end()
+
+    def match_token(self):
+        m = self.pattern.match(self.input_string, self.i)
+        while m is not None and m.end() == len(self.input_string) and self.refill():
+            m = self.pattern.match(self.input_string, self.i)
+        if m is None:
+            self.ws()
+            raise self.parse_error('invalid character {c!r} at {pos}'.format(c=self.c, pos=self.p))
+
+        self.i = m.end()
+        return m
+
+    def next_token(self):
+        m = self.match_token()
+        group = m.lastindex
+        return self.token_class(self.group_types[group], self.group_texts[group] or m.group(group),
+                     self.offset + m.start(group))
+
+    def next_span(self):
+        m = self.match_token()
+        group = m.lastindex
+        return self.group_types[group], self.offset + m.start(group), self.offset + m.end(group)
+
+    def text(self, start, end):
+        if start < self.offset:
+            raise ValueError('text at {start} is no longer buffered; '
+                             'use a TokenList lookahead with StreamLexer'.format(start=start))
+
+        return self.input_string[start - self.offset:end - self.offset]
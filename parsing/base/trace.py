@@ -0,0 +1,101 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Parser tracing events and sinks
+"""
+
+import sys
+from collections import Counter, deque
+
+
+__all__ = ['SPECULATE_START', 'SPECULATE_SUCCESS', 'SPECULATE_FAIL', 'MEMO_HIT', 'MEMO_MISS',
+           'RULE_ENTER', 'RULE_EXIT', 'TracedParser', 'CounterSink', 'RingBufferSink', 'StderrSink']
+
+
+SPECULATE_START = 'speculate-start'
+SPECULATE_SUCCESS = 'speculate-success'
+SPECULATE_FAIL = 'speculate-fail'
+MEMO_HIT = 'memo-hit'
+MEMO_MISS = 'memo-miss'
+RULE_ENTER = 'rule-enter'
+RULE_EXIT = 'rule-exit'
+
+
+class TracedParser(object):
+    """
+    Mixin adding an optional tracer to a parser.
+
+    Hot paths emit events only behind ``if self.tracer is not None``, so a
+    parser without a tracer formats nothing and makes no calls. Rule enter/exit
+    events come from wrappers that set_tracer() installs on the instance for
+    every name in ``rules``; they are removed again by set_tracer(None).
+    """
+    tracer = None
+    rules = ()
+
+    def set_tracer(self, tracer):
+        self.tracer = tracer
+        for name in self.rules:
+            self.__dict__.pop(name, None)
+            if tracer is not None:
+                setattr(self, name, self.traced_rule(getattr(self, name), name, tracer))
+
+    def traced_rule(self, rule, name, tracer):
+        def traced(*args):
+            tracer.event(RULE_ENTER, name, self.index())
+            try:
+                return rule(*args)
+            finally:
+                tracer.event(RULE_EXIT, name, self.index())
+
+        return traced
+
+
+class CounterSink(object):
+    """
+    Aggregates events: counts per kind, per (kind, name) and the deepest
+    speculation nesting seen
+    """
+    def __init__(self):
+        self.counts = Counter()
+        self.names = Counter()
+        self.depth = 0
+        self.max_depth = 0
+
+    def event(self, kind, name, index):
+        self.counts[kind] += 1
+        self.names[kind, name] += 1
+        if kind == SPECULATE_START:
+            self.depth += 1
+            if self.depth > self.max_depth:
+                self.max_depth = self.depth
+        elif kind == SPECULATE_SUCCESS or kind == SPECULATE_FAIL:
+            self.depth -= 1
+
+
+class RingBufferSink(object):
+    """
+    Keeps the last ``size`` events as (kind, name, token index) tuples
+    """
+    def __init__(self, size=1024):
+        self.events = deque(maxlen=size)
+
+    def event(self, kind, name, index):
+        self.events.append((kind, name, index))
+
+
+class StderrSink(object):
+    """
+    Writes one line per event, optionally only for the given kinds
+    """
+    def __init__(self, kinds=None, stream=None):
+        self.kinds = kinds
+        self.stream = stream if stream is not None else sys.stderr
+
+    def event(self, kind, name, index):
+        if self.kinds is None or kind in self.kinds:
+            self.stream.write('{kind} {name} at token {index}\n'.format(kind=kind, name=name, index=index))
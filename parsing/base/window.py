@@ -0,0 +1,129 @@
+#! /usr/bin/env python
+# -*- coding: utf-8 -*-
+
+
+__author__ = 'kid143'
+
+
+"""Token windows shared by the parsers
+"""
+
+from .buffer import TokenList
+
+
+__all__ = ['LookaheadWindow', 'SpeculationWindow']
+
+
+class LookaheadWindow(object):
+    """
+    Fixed size circular token window for LL(k) parsers.
+
+    Storage is preallocated to the next power of two >= k, so lt() masks the
+    index instead of taking a modulo and consume() never has to append.
+    """
+    k = 1
+
+    def __init__(self, input_lexer, k=None):
+        self.lexer = input_lexer
+        if k is not None:
+            self.k = k
+        self.mask = (1 << (self.k - 1).bit_length()) - 1
+        self.lookahead = [None] * (self.mask + 1)
+        self.p = 0
+        for i in range(self.k):
+            self.lookahead[i] = input_lexer.next_token()
+
+    def reset(self, input_string):
+        """Parse input_string next, refilling the ring in place"""
+        self.lexer.reset(input_string)
+        self.p = 0
+        for i in range(self.k):
+            self.lookahead[i] = self.lexer.next_token()
+
+    def lt(self, i):
+        return self.lookahead[(self.p + i - 1) & self.mask]
+
+    def la(self, i):
+        return self.lookahead[(self.p + i - 1) & self.mask].token_type
+
+    def consume(self):
+        self.lookahead[(self.p + self.k) & self.mask] = self.lexer.next_token()
+        self.p = (self.p + 1) & self.mask
+
+
+class SpeculationWindow(object):
+    """
+    Growable token window for backtracking parsers.
+
+    lookahead is a sliding window: tokens before the oldest active marker (or
+    before p when not speculating) are discarded once they make up half of it.
+    offset counts the discarded tokens, so markers hold absolute token indexes
+    and stay valid across compaction. The first k tokens are read up front.
+    """
+    k = 1
+    compact_threshold = 1024
+
+    def __init__(self, input_lexer, lookahead=None):
+        self.lexer = input_lexer
+        self.lookahead = lookahead if lookahead is not None else TokenList()
+        self.markers = []
+        self.p = 0
+        self.offset = 0
+        self.sync(self.k)
+
+    def reset(self, input_string):
+        """Parse input_string next, keeping the lexer and token storage"""
+        self.lexer.reset(input_string)
+        self.restart()
+
+    def restart(self):
+        """Drop the window and read it again from wherever the lexer now is"""
+        self.lookahead.clear()
+        del self.markers[:]
+        self.p = 0
+        self.offset = 0
+        self.sync(self.k)
+
+    def lt(self, i):
+        self.sync(i)
+        return self.lookahead[self.p + i - 1]
+
+    def la(self, i):
+        self.sync(i)
+        return self.lookahead.token_type(self.p + i - 1)
+
+    def sync(self, i):
+        n = self.p + i - len(self.lookahead)
+        if n > 0:
+            self.lookahead.fill(self.lexer, n)
+
+    def consume(self):
+        self.p += 1
+        floor = self.markers[0] - self.offset if self.markers else self.p
+        if floor >= self.compact_threshold and floor * 2 >= len(self.lookahead):
+            self.compact(floor)
+
+        self.sync(1)
+
+    def compact(self, n):
+        self.lookahead.discard(n)
+        self.offset += n
+        self.p -= n
+
+    def index(self):
+        return self.offset + self.p
+
+    def mark(self):
+        index = self.offset + self.p
+        self.markers.append(index)
+        return index
+
+    def release(self):
+        self.seek(self.markers.pop())
+
+    def seek(self, index):
+        self.p = index - self.offset
+
+    @property
+    def is_speculating(self):
+        return len(self.markers) > 0